@@ -1,11 +1,19 @@
 import os
 from datetime import datetime
 from typing import List, Dict, Any
-from openai import AsyncOpenAI
 from .core.config import settings
+from .core import tracing
 
-# Configure OpenAI client
-client = AsyncOpenAI(api_key=settings.openai_api_key)
+# Created on first use: importing openai takes about a second and most
+# workers never generate a summary
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI
+        _client = AsyncOpenAI(api_key=settings.openai_api_key)
+    return _client
 
 async def generate_patient_summary(patient: Dict[str, Any], assessments: List[Dict[str, Any]]) -> str:
     """Generate an AI summary of the patient's mental health status based on their assessments."""
@@ -49,15 +57,16 @@ Keep the summary professional and factual.
     
     try:
         # Call OpenAI API with the latest format
-        response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a professional mental health expert providing patient summaries."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
+        with tracing.span("openai.chat.completions", model="gpt-3.5-turbo", assessments=len(assessments)):
+            response = await get_client().chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are a professional mental health expert providing patient summaries."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=500
+            )
         
         return response.choices[0].message.content.strip()
     except Exception as e:
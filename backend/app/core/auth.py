@@ -1,10 +1,81 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app.core.security import verify_token
+from app.core.security import verify_token, mark_revoked
+from app.core.config import settings
+from app.core.tenancy import set_current_tenant, tenant_context, tenant_scopes, database_scope
+from app.core import invalidation, metrics
+from app.core.cache import get_cache
 from app.db.mongodb import get_database
+import bson
 from bson import ObjectId
+from typing import Dict, Optional
+from datetime import datetime, timedelta
+import asyncio
+import time
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/users/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/users/login", auto_error=False)
+
+# Users looked up by get_current_user, by user id: BSON of {clinicId, user}
+_user_cache = get_cache("users", settings.USER_CACHE_SIZE)
+# Revocations, so other workers reject a token before they hear of it
+_revoked_cache = get_cache("revoked_tokens", settings.JWT_CACHE_SIZE)
+_invalidation_tasks = set()
+
+# Per tenant scope: when revoked_tokens was last read; polls re-read a little
+# before that, since revokedAt comes from other workers' clocks
+_revocations_loaded: Dict[Optional[str], datetime] = {}
+REVOCATION_POLL_OVERLAP = timedelta(minutes=1)
+_revocation_task: Optional[asyncio.Task] = None
+
+async def invalidate_user(user_id: str) -> None:
+    await _user_cache.delete(user_id)
+
+async def _drop_users(user_id: Optional[str]) -> None:
+    try:
+        if user_id is None:
+            await _user_cache.clear()
+        else:
+            await invalidate_user(user_id)
+    except Exception as e:
+        print(f"Error invalidating cached users: {str(e)}")
+
+def _on_user_change(event: invalidation.InvalidationEvent) -> None:
+    task = asyncio.create_task(_drop_users(event.document_id))
+    _invalidation_tasks.add(task)
+    task.add_done_callback(_invalidation_tasks.discard)
+
+def _on_token_revoked(event: invalidation.InvalidationEvent) -> None:
+    # Revocations made by other workers; upserted revocations arrive as inserts
+    if event.operation == "insert" and event.document is not None:
+        mark_revoked(event.document["_id"], (event.document["expiresAt"] - datetime(1970, 1, 1)).total_seconds())
+
+invalidation.subscribe("users", _on_user_change)
+invalidation.subscribe("revoked_tokens", _on_token_revoked)
+
+async def _load_user(user_id: str, clinic_id: str):
+    cached = await _user_cache.get(user_id)
+    if cached is not None:
+        entry = bson.decode(cached)
+        if entry["clinicId"] == clinic_id:
+            metrics.increment("auth.user_cache_hits")
+            return entry["user"]
+    
+    metrics.increment("auth.user_cache_misses")
+    db = get_database()
+    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    if user is not None:
+        ttl = invalidation.cache_ttl(database_scope(clinic_id))
+        await _user_cache.set(user_id, bson.encode({"clinicId": clinic_id, "user": user}), ttl)
+    return user
+
+async def token_revoked(payload: dict) -> bool:
+    """Whether another worker revoked the token before this one heard of it."""
+    jti = payload.get("jti")
+    if jti is None or await _revoked_cache.get(jti) is None:
+        return False
+    mark_revoked(jti, payload["exp"])
+    return True
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
@@ -14,16 +85,96 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     )
     
     payload = verify_token(token)
-    if payload is None:
+    if payload is None or await token_revoked(payload):
         raise credentials_exception
         
     user_id: str = payload.get("sub")
     if user_id is None:
         raise credentials_exception
+    
+    # Every database access for the rest of the request is scoped to this clinic
+    clinic_id = payload.get("clinicId", settings.DEFAULT_CLINIC_ID)
+    set_current_tenant(clinic_id)
         
-    db = get_database()
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await _load_user(user_id, clinic_id)
     if user is None:
         raise credentials_exception
         
-    return user 
\ No newline at end of file
+    return user
+
+async def require_tenant(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    # Open routers still need a clinic to read from once data is shared
+    if settings.MULTI_TENANT:
+        if token is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        await get_current_user(token)
+
+async def get_current_admin(current_user: dict = Depends(get_current_user)):
+    # isAdmin is only set by app.scripts.grant_admin; users can't edit it
+    if current_user.get("isAdmin") is not True:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+async def revoke_token(payload: dict):
+    # Persisted for restarts; other workers see it in the shared cache with
+    # CACHE_BACKEND=socket, and otherwise hear of it through the change
+    # stream, or within INVALIDATION_FALLBACK_TTL_SECONDS by polling
+    db = get_database()
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    await db.revoked_tokens.update_one(
+        {"_id": payload["jti"]},
+        {"$set": {"expiresAt": expires_at, "revokedAt": datetime.utcnow()}},
+        upsert=True
+    )
+    mark_revoked(payload["jti"], payload["exp"])
+    await _revoked_cache.set(payload["jti"], b"1", max(payload["exp"] - time.time(), 1.0))
+
+async def _load_revocations(scope: Optional[str]) -> None:
+    started = datetime.utcnow()
+    query = {"expiresAt": {"$gt": started}}
+    if (since := _revocations_loaded.get(scope)) is not None:
+        query["revokedAt"] = {"$gte": since - REVOCATION_POLL_OVERLAP}
+    with tenant_context(scope):
+        db = get_database()
+    async for revoked in db.revoked_tokens.find(query):
+        mark_revoked(revoked["_id"], (revoked["expiresAt"] - datetime(1970, 1, 1)).total_seconds())
+    _revocations_loaded[scope] = started
+
+async def load_revoked_tokens():
+    """Honor unexpired revocations from every database, e.g. at startup."""
+    for scope in tenant_scopes():
+        await _load_revocations(scope)
+
+async def _poll_revocations() -> None:
+    # Only needed for databases whose change stream isn't open
+    while True:
+        await asyncio.sleep(settings.INVALIDATION_FALLBACK_TTL_SECONDS)
+        for scope in tenant_scopes():
+            if invalidation.streaming(scope):
+                continue
+            try:
+                await _load_revocations(scope)
+            except Exception as e:
+                print(f"Error loading revoked tokens: {str(e)}")
+
+def start_revocation_polling() -> None:
+    global _revocation_task
+    if _revocation_task is None:
+        _revocation_task = asyncio.create_task(_poll_revocations())
+
+async def stop_revocation_polling() -> None:
+    global _revocation_task
+    if _revocation_task is not None:
+        _revocation_task.cancel()
+        try:
+            await _revocation_task
+        except asyncio.CancelledError:
+            pass
+        _revocation_task = None
@@ -0,0 +1,193 @@
+import asyncio
+import struct
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from app.core import metrics
+from app.core.config import settings
+
+# Wire format of the cache daemon, all lengths big-endian:
+#   get:    b"G" key_len:u32 key              -> b"1" value_len:u32 value | b"0"
+#   set:    b"S" key_len:u32 key ttl:f64 value_len:u32 value  -> b"1"
+#   delete: b"D" key_len:u32 key              -> b"1"
+#   clear:  b"C" prefix_len:u32 prefix        -> b"1"
+_LENGTH = struct.Struct(">I")
+_TTL = struct.Struct(">d")
+
+class LocalCache:
+    """Bounded LRU of bytes in this process, with optional per-entry TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.get_nowait(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.set_nowait(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def get_nowait(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires and expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set_nowait(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl if ttl else 0.0)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear_prefix_nowait(self, prefix: str) -> None:
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+class SocketCache:
+    """Cache held by the local cache daemon and shared by every worker.
+
+    Requests go over a pool of up to CACHE_SOCKET_POOL_SIZE Unix socket
+    connections per process, one request at a time on each. If the daemon
+    is unreachable, reads miss and writes are dropped; connections are
+    retried on the next call.
+    """
+
+    _idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+    _slots: Optional[asyncio.Semaphore] = None
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    @classmethod
+    def _get_slots(cls) -> asyncio.Semaphore:
+        if cls._slots is None:
+            cls._slots = asyncio.Semaphore(settings.CACHE_SOCKET_POOL_SIZE)
+        return cls._slots
+
+    @classmethod
+    async def _open(cls) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_unix_connection(settings.CACHE_SOCKET_PATH)
+
+    @classmethod
+    async def connect(cls) -> None:
+        async with cls._get_slots():
+            if not cls._idle:
+                cls._idle.append(await cls._open())
+
+    @classmethod
+    async def close(cls) -> None:
+        for _, writer in cls._idle:
+            writer.close()
+        cls._idle = []
+
+    async def _request(self, payload: bytes, read_value: bool) -> Optional[bytes]:
+        async with self._get_slots():
+            connection = None
+            try:
+                connection = self._idle.pop() if self._idle else await self._open()
+                reader, writer = connection
+                writer.write(payload)
+                await writer.drain()
+                found = await reader.readexactly(1)
+                value = None
+                if read_value and found == b"1":
+                    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                    value = await reader.readexactly(length)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                metrics.increment("cache.socket_errors")
+                print(f"Error talking to cache daemon: {str(e)}")
+                if connection is not None:
+                    connection[1].close()
+                return None
+            except BaseException:
+                # Cancelled mid-exchange: the reply would reach the next caller
+                if connection is not None:
+                    connection[1].close()
+                raise
+            self._idle.append(connection)
+            return value
+
+    def _key(self, key: str) -> bytes:
+        key_bytes = f"{self.namespace}:{key}".encode()
+        return _LENGTH.pack(len(key_bytes)) + key_bytes
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._request(b"G" + self._key(key), read_value=True)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self._request(
+            b"S" + self._key(key) + _TTL.pack(ttl or 0.0) + _LENGTH.pack(len(value)) + value,
+            read_value=False
+        )
+
+    async def delete(self, key: str) -> None:
+        await self._request(b"D" + self._key(key), read_value=False)
+
+    async def clear(self) -> None:
+        # Every key of this namespace
+        await self._request(b"C" + self._key(""), read_value=False)
+
+def get_cache(namespace: str, max_entries: int):
+    """Cache for one use, on the backend chosen by CACHE_BACKEND.
+
+    max_entries bounds the local backend; the daemon has its own bound.
+    """
+    if settings.CACHE_BACKEND == "socket":
+        return SocketCache(namespace)
+    return LocalCache(max_entries)
+
+async def warm() -> None:
+    """Open the daemon connection before the worker takes traffic."""
+    if settings.CACHE_BACKEND == "socket":
+        try:
+            await SocketCache.connect()
+        except OSError as e:
+            print(f"Cache daemon unavailable, continuing without it: {str(e)}")
+
+async def close() -> None:
+    await SocketCache.close()
+
+async def serve(path: str, max_entries: int) -> None:
+    """Run the cache daemon on a Unix socket until cancelled."""
+    store = LocalCache(max_entries)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                op = await reader.readexactly(1)
+                (key_length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                key = (await reader.readexactly(key_length)).decode()
+                if op == b"G":
+                    value = store.get_nowait(key)
+                    writer.write(b"0" if value is None else b"1" + _LENGTH.pack(len(value)) + value)
+                elif op == b"D":
+                    await store.delete(key)
+                    writer.write(b"1")
+                elif op == b"C":
+                    store.clear_prefix_nowait(key)
+                    writer.write(b"1")
+                else:
+                    (ttl,) = _TTL.unpack(await reader.readexactly(_TTL.size))
+                    (value_length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                    store.set_nowait(key, await reader.readexactly(value_length), ttl or None)
+                    writer.write(b"1")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(handle, path)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+from typing import Dict, List, Optional, Tuple
+from app.core import metrics
+from app.core.cache import get_cache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+# Responses that never carry a body; passed on with their headers as they are
+BODILESS_STATUSES = (204, 304)
+
+def _weights(accept: str) -> Dict[str, float]:
+    """q-value of each coding listed in an Accept-Encoding header."""
+    weights: Dict[str, float] = {}
+    for part in accept.split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    return weights
+
+def _vary(headers: List[Tuple[bytes, bytes]]) -> bytes:
+    """The response's Vary values with Accept-Encoding added."""
+    values = [
+        token.strip() for name, value in headers if name == b"vary"
+        for token in value.decode("latin-1").split(",") if token.strip()
+    ]
+    if not any(value == "*" or value.lower() == "accept-encoding" for value in values):
+        values.append("Accept-Encoding")
+    return ", ".join(values).encode("latin-1")
+
+class CompressionMiddleware:
+    """Compress buffered responses with brotli or gzip.
+
+    Thresholds and levels come from settings and can be overridden per
+    route prefix. Responses on COMPRESSION_CACHED_PATHS keep their
+    compressed bytes in the shared cache, keyed by encoding, level and body
+    digest, so identical payloads are compressed once.
+    Streaming and bodiless (HEAD, 1xx, 204, 304) responses pass through
+    untouched. Codings the client gives q=0 are never used.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.cache = get_cache("compression", settings.COMPRESSION_CACHE_SIZE)
+
+    async def __call__(self, scope, receive, send):
+        # HEAD responses have no body to compress
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._negotiate(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        minimum_size, level = self._route_options(path, encoding)
+        cached = any(path.startswith(prefix) for prefix in settings.COMPRESSION_CACHED_PATHS)
+        start_message = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def wrapped_send(message):
+            nonlocal start_message, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = dict(message.get("headers", []))
+                if b"content-encoding" in headers or message["status"] in BODILESS_STATUSES or message["status"] < 200:
+                    passthrough = True
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                if len(chunks) == 1:
+                    # Streaming response: emit as-is rather than buffering it
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                return
+
+            await self._send_response(send, start_message, b"".join(chunks), encoding, minimum_size, level, cached)
+
+        await self.app(scope, receive, wrapped_send)
+
+    async def _send_response(self, send, start_message, body, encoding, minimum_size, level, cached):
+        headers = [
+            (name, value) for name, value in start_message.get("headers", [])
+            if name not in (b"content-length", b"vary")
+        ]
+        headers.append((b"vary", _vary(start_message.get("headers", []))))
+
+        if len(body) < minimum_size:
+            headers.append((b"content-length", str(len(body)).encode()))
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        compressed = None
+        if cached:
+            key = f"{encoding}:{level}:{hashlib.blake2b(body, digest_size=16).hexdigest()}"
+            compressed = await self.cache.get(key)
+            metrics.increment("compression.cache_hits" if compressed is not None else "compression.cache_misses")
+        if compressed is None:
+            compressed = compress(body, encoding, level)
+            if cached:
+                await self.cache.set(key, compressed)
+
+        metrics.increment("compression.bytes_in", len(body))
+        metrics.increment("compression.bytes_out", len(compressed))
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(compressed)).encode()))
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": compressed})
+
+    def _negotiate(self, scope) -> Optional[str]:
+        accept = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1").lower()
+                break
+        weights = _weights(accept)
+        candidates = [
+            (weights.get(encoding, weights.get("*", 0.0)), encoding)
+            for encoding in (("br", "gzip") if brotli is not None else ("gzip",))
+        ]
+        # Highest q wins, brotli on a tie; q=0 refuses an encoding
+        weight, encoding = max(candidates, key=lambda candidate: candidate[0])
+        return encoding if weight > 0 else None
+
+    def _route_options(self, path: str, encoding: str) -> Tuple[int, int]:
+        minimum_size = settings.COMPRESSION_MINIMUM_SIZE
+        level = settings.COMPRESSION_BROTLI_QUALITY if encoding == "br" else settings.COMPRESSION_GZIP_LEVEL
+
+        # Longest matching prefix wins
+        overrides: Dict[str, Dict[str, int]] = settings.COMPRESSION_ROUTE_OVERRIDES
+        for prefix in sorted(overrides, key=len, reverse=True):
+            if path.startswith(prefix):
+                options = overrides[prefix]
+                minimum_size = options.get("minimum_size", minimum_size)
+                level = options.get("brotli_quality" if encoding == "br" else "gzip_level", level)
+                break
+        return minimum_size, level
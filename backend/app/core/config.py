@@ -1,19 +1,145 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict, List
 
 class Settings(BaseSettings):
     # MongoDB settings
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "healthapp"
+    # Connections each worker opens at startup, so first requests don't pay for them
+    MONGODB_MIN_POOL_SIZE: int = 10
+    
+    # Deployment settings for app.serve (0 workers = one per CPU)
+    WEB_CONCURRENCY: int = 0
+    # Cache shared by workers: "local" (per process) or "socket" (local cache daemon)
+    CACHE_BACKEND: str = "local"
+    CACHE_SOCKET_PATH: str = "/tmp/bettermind-cache.sock"
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_SOCKET_POOL_SIZE: int = 4
+    
+    # Multi-clinic settings
+    # Confine users, assessments and notifications to the clinic in the JWT
+    MULTI_TENANT: bool = False
+    DEFAULT_CLINIC_ID: str = "default"
+    # Clinic id -> MongoDB URL for clinics with a dedicated deployment
+    TENANT_DATABASES: Dict[str, str] = {}
+    
+    # Profiler settings
+    PROFILER_INTERVAL_MS: int = 5
+    PROFILER_MAX_SECONDS: int = 60
     
     # JWT settings
     SECRET_KEY: str = "your-secret-key-here"  # Change this in production
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    JWT_BACKEND: str = "jose"  # or "pyjwt" when PyJWT is installed
+    JWT_CACHE_SIZE: int = 10000
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    
+    # Password hashing; run app.scripts.calibrate_bcrypt to pick rounds for this host
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: int = 250
+    
+    # Rate limiting: name -> token bucket refilled at per_minute, holding up to burst
+    # "memory" (the cache backend), "mongo" (shared by all workers), or "auto":
+    # mongo when app.serve runs several workers that don't share a cache
+    RATE_LIMIT_STORE: str = "auto"
+    # Proxies (IPs or CIDRs) whose X-Forwarded-For names the client to rate limit
+    TRUSTED_PROXIES: List[str] = ["127.0.0.1", "::1"]
+    RATE_LIMITS: Dict[str, Dict[str, float]] = {
+        "login": {"per_minute": 10, "burst": 5},
+        "ai_summary": {"per_minute": 6, "burst": 3},
+    }
+    RATE_LIMIT_MEMORY_KEYS: int = 100000
+    # Requests one worker runs at once per route; the rest get 429 straight away
+    CONCURRENCY_LIMITS: Dict[str, int] = {
+        "login": 8,
+        "ai_summary": 4,
+    }
+    
+    # Parquet export of completed assessments (app.scripts.export_parquet)
+    EXPORT_PARQUET_DIR: str = "exports/assessments"
+    EXPORT_BATCH_SIZE: int = 5000
+    EXPORT_LAG_SECONDS: int = 60
+    # Longer than the slowest export; a crashed run's lease expires after it
+    EXPORT_LEASE_SECONDS: int = 3600
+    
+    # Change-stream cache invalidation (needs a replica set; TTLs otherwise)
+    INVALIDATION_BUS: bool = True
+    INVALIDATION_CACHE_TTL_SECONDS: int = 300
+    INVALIDATION_FALLBACK_TTL_SECONDS: int = 5
+    INVALIDATION_RETRY_SECONDS: int = 30
+    USER_CACHE_SIZE: int = 10000
+    
+    # Bulk assessment import (POST /api/assessments/import)
+    IMPORT_CHUNK_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 1000
+    IMPORT_MAX_LINE_BYTES: int = 65536
+    
+    # Notification broadcast settings
+    NOTIFICATION_BROADCAST_BATCH_SIZE: int = 1000
+    NOTIFICATION_BROADCAST_JOB_TTL_HOURS: int = 24
+    
+    # Notification retention settings; the read TTL is only a backstop for
+    # when the archiver is not running, so it must fire after archiving
+    NOTIFICATION_READ_TTL_DAYS: int = 60
+    NOTIFICATION_ARCHIVE_AFTER_DAYS: int = 30
+    NOTIFICATION_ARCHIVE_BATCH_SIZE: int = 1000
+    NOTIFICATION_ARCHIVE_INTERVAL_SECONDS: int = 3600
+    
+    # Analytics rollup settings
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: int = 900
+    ANALYTICS_ROLLUP_LAG_SECONDS: int = 60
+    # A run that hasn't finished by then is presumed dead and its days recounted
+    ANALYTICS_ROLLUP_LEASE_SECONDS: int = 600
+    
+    # Audit log settings
+    AUDIT_BUFFER_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_MS: int = 1000
+    AUDIT_DROP_POLICY: str = "drop_oldest"  # or "drop_newest"
+    
+    # Response compression settings
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    # Path prefix -> {"minimum_size", "gzip_level", "brotli_quality"}
+    COMPRESSION_ROUTE_OVERRIDES: Dict[str, Dict[str, int]] = {
+        "/api/doctor/patients": {"minimum_size": 512, "gzip_level": 5},
+        "/api/assessments": {"minimum_size": 512, "gzip_level": 5},
+    }
+    # Static-ish payloads whose compressed bytes are cached in memory
+    COMPRESSION_CACHED_PATHS: List[str] = ["/api/pre-assessment/questions"]
+    COMPRESSION_CACHE_SIZE: int = 128
+    
+    # Tracing settings
+    TRACING_EXPORTER: str = "none"  # "none", "json" or "otlp"
+    TRACING_SAMPLE_RATE: float = 0.01
+    TRACING_JSON_PATH: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SERVICE_NAME: str = "bettermind-api"
+    
+    # Slow query log settings (0 disables it)
+    SLOW_QUERY_THRESHOLD_MS: int = 100
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_QUEUE_SIZE: int = 1000
+    SLOW_QUERY_CAPPED_BYTES: int = 16 * 1024 * 1024
     
     # OpenAI settings
     openai_api_key: str = "API KEY HERE"
     
+    @model_validator(mode="after")
+    def check_notification_retention(self):
+        # readAt is never before createdAt, so this keeps read notifications
+        # in the hot collection until at least one archiver run has seen them
+        archived_within = self.NOTIFICATION_ARCHIVE_AFTER_DAYS * 86400 + self.NOTIFICATION_ARCHIVE_INTERVAL_SECONDS
+        if self.NOTIFICATION_READ_TTL_DAYS * 86400 <= archived_within:
+            raise ValueError(
+                "NOTIFICATION_READ_TTL_DAYS must exceed NOTIFICATION_ARCHIVE_AFTER_DAYS plus one "
+                "archiver interval, or read notifications expire before they are archived"
+            )
+        return self
+    
     class Config:
         env_file = ".env"
 
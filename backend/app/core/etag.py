@@ -0,0 +1,94 @@
+from typing import Iterable
+from fastapi import Depends, HTTPException, Request, Response, status
+from pymongo import UpdateOne
+from app.core import metrics
+from app.core.auth import get_current_user
+from app.services import audit
+from app.db.mongodb import get_database
+from app.services.care_assignments import get_doctor_ids, is_assigned
+
+# Version counter keys
+ROSTER_KEY = "roster:{current_user_id}"
+
+def user_key(user_id) -> str:
+    return f"user:{user_id}"
+
+def roster_key(doctor_id) -> str:
+    return ROSTER_KEY.format(current_user_id=doctor_id)
+
+async def bump_versions(*keys: str) -> None:
+    """Invalidate the ETags of every resource scoped by these keys."""
+    db = get_database()
+    await db.versions.bulk_write(
+        [UpdateOne({"_id": key}, {"$inc": {"v": 1}}, upsert=True) for key in keys],
+        ordered=False
+    )
+
+async def bump_user_versions(user_id) -> None:
+    """Bump a user's own counter and the rosters of their assigned doctors."""
+    doctor_ids = await get_doctor_ids(str(user_id))
+    await bump_versions(user_key(user_id), *(roster_key(doctor_id) for doctor_id in doctor_ids))
+
+async def _check(request: Request, response: Response, key: str) -> None:
+    db = get_database()
+    version = await db.versions.find_one({"_id": key})
+    etag = f'W/"{key}-{version["v"] if version else 0}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    metrics.increment("etag.requests")
+    if _matches(request.headers.get("if-none-match"), etag):
+        metrics.increment("etag.not_modified")
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates: Iterable[str] = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag == "*" or tag == etag for tag in candidates)
+
+def conditional_get(template: str):
+    """Dependency factory answering If-None-Match with 304 before the handler runs.
+
+    The version key is built from the route's path parameters, e.g.
+    ``conditional_get("user:{user_id}")``.
+    """
+    async def dependency(request: Request, response: Response):
+        await _check(request, response, template.format(**request.path_params))
+    return dependency
+
+async def current_user_conditional_get(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
+    await _check(request, response, user_key(current_user["_id"]))
+
+def doctor_conditional_get(template: str):
+    """Like conditional_get, but only short-circuits for authenticated doctors.
+
+    Everyone else falls through to the handler and its own role check. The
+    template may also reference ``{current_user_id}``. On routes with a
+    ``patient_id``, doctors the patient isn't assigned to get a 404 first,
+    so a 304 never confirms that the patient exists, and the access is
+    audited here, so cached views are recorded too.
+    """
+    async def dependency(
+        request: Request,
+        response: Response,
+        current_user: dict = Depends(get_current_user)
+    ):
+        if current_user["role"] != "doctor":
+            return
+        patient_id = request.path_params.get("patient_id")
+        if patient_id is not None and not await is_assigned(str(current_user["_id"]), patient_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Patient not found"
+            )
+        if patient_id is not None:
+            audit.record(str(current_user["_id"]), patient_id, f"{request.method} {request.scope['route'].path}")
+        key = template.format(current_user_id=str(current_user["_id"]), **request.path_params)
+        await _check(request, response, key)
+    return dependency
@@ -0,0 +1,119 @@
+import asyncio
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+from pymongo.errors import OperationFailure, PyMongoError
+from app.core import metrics
+from app.core.config import settings
+from app.core.tenancy import tenant_context, tenant_scopes
+from app.db.mongodb import get_database
+
+# Server errors after which a resume token can't be used again
+RESUME_FAILED_CODES = {260, 280, 286}  # InvalidResumeToken, ChangeStreamFatalError, ChangeStreamHistoryLost
+
+class InvalidationEvent(NamedTuple):
+    """A change to one document, or to a whole collection when document_id is None."""
+    collection: str
+    operation: str  # change stream operationType, or "flush"
+    document_id: Optional[str]
+    scope: Optional[str]  # tenant_scopes() entry of the database it happened in
+    document: Optional[Dict[str, Any]] = None  # full document, inserts only
+
+Subscriber = Callable[[InvalidationEvent], None]
+
+_subscribers: Dict[str, List[Subscriber]] = {}
+# Scopes whose change stream is currently open
+_streaming: Set[Optional[str]] = set()
+_watch_tasks: List[asyncio.Task] = []
+
+def subscribe(collection: str, callback: Subscriber) -> None:
+    """Call back on every change to the collection, from any worker.
+
+    Callbacks run on the event loop and must not block. A "flush" event with
+    no document_id means changes may have been missed: drop everything.
+    """
+    _subscribers.setdefault(collection, []).append(callback)
+
+def publish(event: InvalidationEvent) -> None:
+    metrics.increment(f"invalidation.{event.operation}")
+    for callback in _subscribers.get(event.collection, []):
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"Error handling invalidation of {event.collection}: {str(e)}")
+
+def _flush(scope: Optional[str]) -> None:
+    for collection in list(_subscribers):
+        publish(InvalidationEvent(collection, "flush", None, scope))
+
+def streaming(scope: Optional[str] = None) -> bool:
+    return scope in _streaming
+
+def cache_ttl(scope: Optional[str] = None) -> float:
+    """How long a cached document may be served without re-reading it.
+
+    Long while the change stream delivers invalidations, short when it is
+    down, e.g. on a standalone server without a replica set.
+    """
+    if streaming(scope):
+        return settings.INVALIDATION_CACHE_TTL_SECONDS
+    return settings.INVALIDATION_FALLBACK_TTL_SECONDS
+
+def _event(change: Dict[str, Any], scope: Optional[str]) -> InvalidationEvent:
+    document_key = change.get("documentKey")
+    return InvalidationEvent(
+        collection=change["ns"]["coll"],
+        operation=change["operationType"],
+        document_id=str(document_key["_id"]) if document_key else None,
+        scope=scope,
+        document=change.get("fullDocument")
+    )
+
+async def _watch(scope: Optional[str]) -> None:
+    """Tail one database's change stream for the subscribed collections."""
+    pipeline = [{"$match": {"ns.coll": {"$in": list(_subscribers)}}}]
+    resume_token = None
+    failures = 0
+    while True:
+        try:
+            with tenant_context(scope):
+                db = get_database()
+            async with db.watch(pipeline, resume_after=resume_token, max_await_time_ms=1000) as stream:
+                while stream.alive:
+                    change = await stream.try_next()
+                    if scope not in _streaming:
+                        # Open; anything cached before now was cached under the fallback TTL
+                        _streaming.add(scope)
+                        failures = 0
+                        print(f"Invalidation stream open for {scope or 'shared'} database")
+                    resume_token = stream.resume_token
+                    if change is not None:
+                        publish(_event(change, scope))
+        except asyncio.CancelledError:
+            raise
+        except PyMongoError as e:
+            if isinstance(e, OperationFailure) and e.code in RESUME_FAILED_CODES:
+                resume_token = None
+            metrics.increment("invalidation.stream_errors")
+            failures += 1
+            if failures == 1:
+                print(f"Invalidation stream unavailable for {scope or 'shared'} database, using TTLs: {str(e)}")
+        if scope in _streaming:
+            # Entries cached under the long TTL may have missed changes since
+            _streaming.discard(scope)
+            _flush(scope)
+        await asyncio.sleep(settings.INVALIDATION_RETRY_SECONDS)
+
+def start_bus() -> None:
+    if settings.INVALIDATION_BUS and not _watch_tasks and _subscribers:
+        for scope in tenant_scopes():
+            _watch_tasks.append(asyncio.create_task(_watch(scope)))
+
+async def stop_bus() -> None:
+    for task in _watch_tasks:
+        task.cancel()
+    for task in _watch_tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _watch_tasks.clear()
+    _streaming.clear()
@@ -0,0 +1,17 @@
+from collections import defaultdict
+from typing import Dict
+
+# Process-local counters, exposed to admins through GET /api/metrics
+_counters: Dict[str, float] = defaultdict(int)
+
+def increment(name: str, value: float = 1) -> None:
+    _counters[name] += value
+
+def ratio(numerator: str, denominator: str) -> float:
+    total = _counters.get(denominator, 0)
+    return round(_counters.get(numerator, 0) / total, 4) if total else 0.0
+
+def snapshot() -> Dict[str, float]:
+    metrics = dict(_counters)
+    metrics["etag.hit_rate"] = ratio("etag.not_modified", "etag.requests")
+    return metrics
@@ -0,0 +1,106 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# (file, function, first line) of one frame
+FrameKey = Tuple[str, str, int]
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTERS_DIR = os.path.join(APP_ROOT, "routers") + os.sep
+IDLE_FUNCTIONS = {"select", "poll", "epoll", "kqueue"}
+
+class SamplingProfiler:
+    """Sample one thread's Python stack at a fixed interval.
+
+    Nothing is installed in the interpreter: a sampler thread reads the
+    target thread's frame through sys._current_frames() only while a
+    profile is running, so there is no cost when it is not.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[FrameKey] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[tuple(stack)] += 1
+
+    def _labelled_stacks(self) -> List[Tuple[List[str], int]]:
+        stacks = []
+        for stack, count in self.samples.items():
+            frames = [_frame_name(key) for key in stack]
+            # Attribute each sample to the router it runs in, or to idle time
+            router = next(
+                (os.path.basename(key[0])[:-3] for key in reversed(stack) if key[0].startswith(ROUTERS_DIR)),
+                None
+            )
+            if router is not None:
+                root = f"[router:{router}]"
+            elif stack and stack[-1][1] in IDLE_FUNCTIONS:
+                root = "[idle]"
+            else:
+                root = "[other]"
+            stacks.append(([root, *frames], count))
+        return stacks
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format, one "a;b;c count" per line."""
+        return "\n".join(
+            f"{';'.join(frames)} {count}"
+            for frames, count in sorted(self._labelled_stacks(), key=lambda item: -item[1])
+        ) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        """A sampled profile in the speedscope file format."""
+        frame_index: Dict[str, int] = {}
+        samples = []
+        weights = []
+        for frames, count in self._labelled_stacks():
+            samples.append([frame_index.setdefault(name, len(frame_index)) for name in frames])
+            weights.append(round(count * self.interval, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": name} for name in frame_index]},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"worker {os.getpid()}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self.duration, 6),
+                "samples": samples,
+                "weights": weights
+            }],
+            "exporter": "bettermind-api"
+        }
+
+def _frame_name(key: FrameKey) -> str:
+    filename, function, line = key
+    if filename.startswith(APP_ROOT):
+        filename = "app" + filename[len(APP_ROOT):]
+    return f"{function} ({filename}:{line})"
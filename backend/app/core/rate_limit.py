@@ -0,0 +1,161 @@
+import ipaddress
+import math
+import struct
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from fastapi import Depends, HTTPException, Request, status
+from pymongo import ReturnDocument
+from app.core import metrics
+from app.core.auth import get_current_user
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.tenancy import tenant_context
+from app.db.mongodb import get_database
+
+RATE_LIMIT_COLLECTION = "rate_limits"
+
+# A bucket in the cache: tokens left and when they were counted (epoch seconds)
+_BUCKET = struct.Struct(">dd")
+
+class MemoryBucketStore:
+    """Token buckets in the cache backend, least recently used evicted first.
+
+    Per worker with CACHE_BACKEND=local; shared by the workers through the
+    cache daemon with CACHE_BACKEND=socket. A bucket is read and written in
+    separate calls, so workers racing on one key can let a request or two
+    past the limit.
+    """
+
+    def __init__(self, max_keys: int):
+        self.cache = get_cache("rate_limits", max_keys)
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Take one token; returns 0 or the seconds until one is available."""
+        # Wall clock, since buckets may be shared between processes
+        now = time.time()
+        cached = await self.cache.get(key)
+        tokens, updated = _BUCKET.unpack(cached) if cached is not None else (burst, now)
+        tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        # Left alone this long, the bucket is full again and can go
+        await self.cache.set(key, _BUCKET.pack(tokens, now), burst / rate)
+        return wait
+
+class MongoBucketStore:
+    """Token buckets shared by all workers, one atomic update per request."""
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        # Buckets live in the shared database, whichever clinic is calling
+        with tenant_context(None):
+            db = get_database()
+        now = datetime.utcnow()
+        refilled = {"$min": [burst, {"$add": [
+            {"$ifNull": ["$tokens", burst]},
+            {"$multiply": [{"$subtract": [now, {"$ifNull": ["$updatedAt", now]}]}, rate / 1000]}
+        ]}]}
+        bucket = await db[RATE_LIMIT_COLLECTION].find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updatedAt": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    # A bucket left alone this long is full again, so it can go
+                    "expiresAt": now + timedelta(seconds=burst / rate)
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return 0.0 if bucket["allowed"] else (1 - bucket["tokens"]) / rate
+
+_memory_store = MemoryBucketStore(settings.RATE_LIMIT_MEMORY_KEYS)
+_mongo_store = MongoBucketStore()
+
+def _store():
+    store = settings.RATE_LIMIT_STORE
+    if store == "auto":
+        # app.serve exports the worker count; per-worker buckets would
+        # multiply the limit by it
+        shared = settings.WEB_CONCURRENCY <= 1 or settings.CACHE_BACKEND == "socket"
+        store = "memory" if shared else "mongo"
+    return _mongo_store if store == "mongo" else _memory_store
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests, please retry later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+async def check_rate_limit(name: str, key: str) -> None:
+    limit = settings.RATE_LIMITS.get(name)
+    if not limit:
+        return
+    rate = limit["per_minute"] / 60
+    wait = await _store().take(f"{name}:{key}", rate, limit["burst"])
+    if wait > 0:
+        metrics.increment(f"rate_limit.rejected.{name}")
+        raise _too_many_requests(wait)
+
+_trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXIES]
+
+def _trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+def client_ip(request: Request) -> str:
+    """The address a request came from, looking through trusted proxies.
+
+    X-Forwarded-For is read right to left and the first hop that is not
+    a trusted proxy wins; anything left of it could be forged by the client.
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _trusted(host):
+        return host
+    for hop in reversed(request.headers.get("x-forwarded-for", "").split(",")):
+        hop = hop.strip()
+        if not hop:
+            continue
+        host = hop
+        if not _trusted(hop):
+            break
+    return host
+
+def rate_limit_by_ip(name: str) -> Callable:
+    async def dependency(request: Request):
+        await check_rate_limit(name, client_ip(request))
+    return dependency
+
+def rate_limit_by_user(name: str) -> Callable:
+    async def dependency(current_user: dict = Depends(get_current_user)):
+        await check_rate_limit(name, str(current_user["_id"]))
+    return dependency
+
+# Requests currently inside each capped route, in this worker
+_in_flight: Dict[str, int] = {}
+
+def concurrency_limit(name: str) -> Callable:
+    """Reject instead of queueing once CONCURRENCY_LIMITS[name] requests run."""
+    async def dependency():
+        limit: Optional[int] = settings.CONCURRENCY_LIMITS.get(name)
+        if limit is None:
+            yield
+            return
+        if _in_flight.get(name, 0) >= limit:
+            metrics.increment(f"concurrency.rejected.{name}")
+            raise _too_many_requests(1)
+        _in_flight[name] = _in_flight.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            _in_flight[name] -= 1
+    return dependency
@@ -0,0 +1,31 @@
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from app.core.tenancy import require_tenant_choice
+
+# ASGI scope of the request being served, for code far from the handler
+_current_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_scope", default=None)
+
+def current_route() -> Optional[str]:
+    """"METHOD /route/{template}" of the current request, once it is routed."""
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else scope['path']}"
+
+class RequestContextMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _current_scope.set(scope)
+        # Unscoped database access must be chosen, not inherited
+        require_tenant_choice()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
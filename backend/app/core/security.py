@@ -1,10 +1,22 @@
+import hashlib
+import secrets
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from app.core import metrics
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+try:
+    import jwt as pyjwt
+except ImportError:  # PyJWT is optional; python-jose is the default backend
+    pyjwt = None
+
+# Hashes made with other rounds still verify and are flagged by needs_update
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,6 +24,9 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -19,13 +34,69 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # jti identifies the token for revocation
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[dict]:
+def create_refresh_token() -> str:
+    # Opaque and random; only its hash is stored
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(token: str) -> str:
+    # The token carries 256 bits of entropy, so a fast unsalted hash is enough
+    return hashlib.sha256(token.encode()).hexdigest()
+
+# Verified payloads keyed by SHA-256 of the token, oldest first
+_verified_tokens: "OrderedDict[bytes, dict]" = OrderedDict()
+
+# Revoked token ids and when each token would have expired anyway
+_revoked_tokens: Dict[str, float] = {}
+
+def _decode(token: str) -> Optional[dict]:
+    if settings.JWT_BACKEND == "pyjwt" and pyjwt is not None:
+        try:
+            return pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except pyjwt.PyJWTError:
+            return None
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
-        return None 
\ No newline at end of file
+        return None
+
+def verify_token(token: str) -> Optional[dict]:
+    """Decode and validate a token, reusing earlier verifications.
+
+    Cached payloads are dropped once the token's exp passes, and revocation
+    is checked on every call, cached or not.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+    
+    payload = _verified_tokens.get(key)
+    if payload is not None and payload["exp"] <= now:
+        del _verified_tokens[key]
+        payload = None
+    
+    if payload is None:
+        metrics.increment("auth.token_cache_misses")
+        payload = _decode(token)
+        if payload is None or "exp" not in payload:
+            return None
+        _verified_tokens[key] = payload
+        if len(_verified_tokens) > settings.JWT_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+    else:
+        _verified_tokens.move_to_end(key)
+        metrics.increment("auth.token_cache_hits")
+    
+    if payload.get("jti") in _revoked_tokens:
+        return None
+    return payload
+
+def mark_revoked(jti: str, expires_at: float) -> None:
+    """Reject the token with this id from now on, in this process."""
+    now = time.time()
+    for revoked_jti in [revoked for revoked, expires in _revoked_tokens.items() if expires <= now]:
+        del _revoked_tokens[revoked_jti]
+    _revoked_tokens[jti] = expires_at 
\ No newline at end of file
@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+from app.core.config import settings
+
+# Clinic id of the request being served; None means unscoped (system) access
+_current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+# False in a request until it picks a clinic, or system access explicitly
+_tenant_chosen: ContextVar[bool] = ContextVar("tenant_chosen", default=True)
+
+def get_current_tenant() -> Optional[str]:
+    return _current_tenant.get()
+
+def set_current_tenant(clinic_id: Optional[str]) -> None:
+    _current_tenant.set(clinic_id)
+    _tenant_chosen.set(True)
+
+def tenant_chosen() -> bool:
+    return _tenant_chosen.get()
+
+def require_tenant_choice() -> None:
+    """Deny unscoped access until the current request picks a tenant.
+
+    Startup, background jobs and scripts keep system access; requests get
+    it only through set_current_tenant(None) or tenant_context(None).
+    """
+    _tenant_chosen.set(False)
+
+@contextmanager
+def tenant_context(clinic_id: Optional[str]) -> Iterator[None]:
+    token = _current_tenant.set(clinic_id)
+    chosen_token = _tenant_chosen.set(True)
+    try:
+        yield
+    finally:
+        _tenant_chosen.reset(chosen_token)
+        _current_tenant.reset(token)
+
+def database_scope(clinic_id: Optional[str]) -> Optional[str]:
+    """The tenant_scopes() entry whose database holds this clinic's data."""
+    return clinic_id if clinic_id in settings.TENANT_DATABASES else None
+
+def tenant_scopes() -> List[Optional[str]]:
+    """Scopes that background jobs must visit to cover every database.
+
+    None covers the shared database unscoped; each clinic routed to its own
+    database through TENANT_DATABASES is visited separately.
+    """
+    return [None, *settings.TENANT_DATABASES.keys()]
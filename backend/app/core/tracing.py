@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from fastapi.responses import JSONResponse
+from pymongo import monitoring
+from app.core.config import settings
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self.trace.spans.append(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ]
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+class Trace:
+    """Spans of one sampled request, exported together when it finishes."""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        # Appended from Motor's executor threads too; list.append is atomic
+        self.spans: List[Span] = []
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+# Innermost open span of the current request; None when not sampled
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def enabled() -> bool:
+    return settings.TRACING_EXPORTER != "none"
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Child span of the current request; a shared no-op when not sampled."""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.set_attribute("error", str(e))
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+class TracedJSONResponse(JSONResponse):
+    """JSONResponse whose body encoding shows up as a span."""
+
+    def render(self, content: Any) -> bytes:
+        with span("response.encode") as encode_span:
+            body = super().render(content)
+            encode_span.set_attribute("http.response_content_length", len(body))
+        return body
+
+class TracingMiddleware:
+    """Open a root span per sampled request and export the finished trace."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled() or random.random() >= settings.TRACING_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(Trace(), f"{scope['method']} {scope['path']}", None, {
+            "http.method": scope["method"],
+            "http.target": scope["path"]
+        })
+        token = _current_span.set(root)
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            _current_span.reset(token)
+            # Name the root after the matched route template once it is known
+            if (route := scope.get("route")) is not None:
+                root.name = f"{scope['method']} {route.path}"
+                root.set_attribute("http.route", route.path)
+            root.end()
+            _export(root.trace)
+
+class CommandTracer(monitoring.CommandListener):
+    """Turn every Motor command of a sampled request into a child span.
+
+    Motor runs PyMongo in executor threads but copies the caller's context,
+    so the request's current span is visible when a command starts.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Any, Span] = {}
+
+    def started(self, event):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        self._pending[(event.connection_id, event.request_id)] = Span(
+            parent.trace,
+            f"mongodb.{event.command_name}",
+            parent.span_id,
+            {
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": event.command_name,
+                "db.mongodb.collection": str(event.command.get(event.command_name, ""))
+            }
+        )
+
+    def succeeded(self, event):
+        if (command_span := self._pending.pop((event.connection_id, event.request_id), None)) is not None:
+            command_span.end()
+
+    def failed(self, event):
+        if (command_span := self._pending.pop((event.connection_id, event.request_id), None)) is not None:
+            command_span.set_attribute("error", str(event.failure))
+            command_span.end()
+
+def command_listeners() -> List[monitoring.CommandListener]:
+    """Listeners to register on Motor clients; none unless tracing is on."""
+    return [CommandTracer()] if enabled() else []
+
+_json_lock = threading.Lock()
+_export_tasks = set()
+
+def _export(trace: Trace) -> None:
+    spans = [recorded.to_otlp() for recorded in trace.spans]
+    if settings.TRACING_EXPORTER == "json":
+        # File writes block, so they happen off the event loop
+        task = asyncio.create_task(asyncio.to_thread(_write_json, spans))
+    elif settings.TRACING_EXPORTER == "otlp":
+        task = asyncio.create_task(_post_otlp(spans))
+    else:
+        return
+    _export_tasks.add(task)
+    task.add_done_callback(_export_tasks.discard)
+
+def _write_json(spans: List[Dict[str, Any]]) -> None:
+    try:
+        with _json_lock, open(settings.TRACING_JSON_PATH, "a") as f:
+            for recorded in spans:
+                f.write(json.dumps(recorded) + "\n")
+    except OSError as e:
+        print(f"Error exporting trace: {str(e)}")
+
+async def _post_otlp(spans: List[Dict[str, Any]]) -> None:
+    import httpx
+
+    payload = {"resourceSpans": [{
+        "resource": {"attributes": [
+            {"key": "service.name", "value": {"stringValue": settings.TRACING_SERVICE_NAME}}
+        ]},
+        "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}]
+    }]}
+    try:
+        async with httpx.AsyncClient(timeout=2) as client:
+            await client.post(settings.TRACING_OTLP_ENDPOINT, json=payload)
+    except Exception as e:
+        print(f"Error exporting trace: {str(e)}")
@@ -1,17 +1,189 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure, CollectionInvalid
 from app.core.config import settings
+from app.core.tracing import command_listeners
+from app.core.tenancy import get_current_tenant, tenant_chosen, tenant_context, tenant_scopes
+from app.db.tenant import TenantScopedDatabase
+from app.db.slow_queries import slow_query_recorder, SLOW_QUERY_COLLECTION
 
 class MongoDB:
     client: AsyncIOMotorClient = None
     db = None
+    # One client per URL, shared by clinics routed to the same deployment
+    clients = {}
+    # Clinics routed to their own deployment, keyed by clinic id
+    tenant_clients = {}
+    slow_query_recorders = []
+
+def _create_client(url: str) -> AsyncIOMotorClient:
+    listeners = command_listeners()
+    if (recorder := slow_query_recorder()) is not None:
+        listeners.append(recorder)
+        MongoDB.slow_query_recorders.append(recorder)
+    
+    client = AsyncIOMotorClient(url, event_listeners=listeners, minPoolSize=settings.MONGODB_MIN_POOL_SIZE)
+    if recorder is not None:
+        # Explains run against the deployment the slow command came from
+        recorder.client = client
+    return client
 
 async def connect_to_mongo():
-    MongoDB.client = AsyncIOMotorClient(settings.MONGODB_URL)
+    MongoDB.client = _create_client(settings.MONGODB_URL)
     MongoDB.db = MongoDB.client[settings.MONGODB_DB_NAME]
+    
+    MongoDB.clients = {settings.MONGODB_URL: MongoDB.client}
+    for clinic_id, url in settings.TENANT_DATABASES.items():
+        if url not in MongoDB.clients:
+            MongoDB.clients[url] = _create_client(url)
+        MongoDB.tenant_clients[clinic_id] = MongoDB.clients[url]
+
+async def warm_connections():
+    # Server selection and the first connection happen here, not on a request
+    for client in MongoDB.clients.values():
+        await client.admin.command("ping")
 
 async def close_mongo_connection():
-    if MongoDB.client:
-        MongoDB.client.close()
+    for recorder in MongoDB.slow_query_recorders:
+        await recorder.close()
+    MongoDB.slow_query_recorders = []
+    for client in MongoDB.clients.values():
+        client.close()
+    MongoDB.clients = {}
+    MongoDB.tenant_clients = {}
+
+async def create_indexes():
+    for clinic_id in tenant_scopes():
+        with tenant_context(clinic_id):
+            await _create_indexes(get_database())
+
+async def _create_indexes(db):
+    if settings.MULTI_TENANT:
+        # Tenant-scoped queries and the {clinicId, userId} shard key
+        await db.assessments.create_index([("clinicId", ASCENDING), ("userId", ASCENDING)])
+        await db.notifications.create_index([("clinicId", ASCENDING), ("userId", ASCENDING)])
+    
+    # Users: one account per email, per clinic with MULTI_TENANT
+    try:
+        if settings.MULTI_TENANT:
+            await db.users.create_index([("clinicId", ASCENDING), ("email", ASCENDING)], unique=True)
+        else:
+            await db.users.create_index("email", unique=True)
+    except OperationFailure as e:
+        # Duplicates already stored, or a sharded users collection; sign up and updates still check
+        print(f"Could not create unique index on users.email: {str(e)}")
+    
+    # Notifications: user-scoped reads, and TTL expiry of read notifications
+    await db.notifications.create_index([("userId", ASCENDING), ("read", ASCENDING)])
+    read_ttl = settings.NOTIFICATION_READ_TTL_DAYS * 24 * 3600
+    try:
+        await db.notifications.create_index(
+            "readAt",
+            expireAfterSeconds=read_ttl,
+            partialFilterExpression={"read": True}
+        )
+    except OperationFailure as e:
+        if e.code != 85:  # IndexOptionsConflict
+            raise
+        # NOTIFICATION_READ_TTL_DAYS changed since the index was built
+        await db.command("collMod", "notifications", index={"keyPattern": {"readAt": 1}, "expireAfterSeconds": read_ttl})
+    await db.notifications.create_index("createdAt")
+    await db.notifications_archive.create_index([("userId", ASCENDING), ("createdAt", DESCENDING)])
+    
+    # Broadcast jobs: progress readable from any worker, for a limited time
+    await db.broadcast_jobs.create_index(
+        "createdAt",
+        expireAfterSeconds=settings.NOTIFICATION_BROADCAST_JOB_TTL_HOURS * 3600
+    )
+    
+    # Assessments: per-patient, per-instrument time series
+    await db.assessments.create_index([
+        ("userId", ASCENDING),
+        ("assessmentType", ASCENDING),
+        ("completedAt", ASCENDING)
+    ])
+    
+    await db.assessments.create_index("completedAt")
+    
+    # Backfilled results for the Parquet export, which finds them by arrival
+    await db.assessments.create_index("importedAt", sparse=True)
+    
+    # Imported results: the same source record can't be imported twice.
+    # Prefixed by the {clinicId, userId} shard key, as sharding requires
+    await db.assessments.create_index(
+        [("clinicId", ASCENDING), ("userId", ASCENDING), ("externalId", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"externalId": {"$exists": True}}
+    )
+    
+    # Analytics rollups
+    await db.analytics_daily.create_index("_id.day")
+    await db.analytics_funnel.create_index("types")
+    
+    # Triage queue: highest severity first, most recent first within a rank
+    await db.triage.create_index([("severityRank", DESCENDING), ("latestAssessmentAt", DESCENDING)])
+    
+    # Care assignments: doctor rosters and patient -> doctors lookups
+    await db.care_assignments.create_index(
+        [("doctorId", ASCENDING), ("patientId", ASCENDING)],
+        unique=True
+    )
+    await db.care_assignments.create_index([("patientId", ASCENDING), ("doctorId", ASCENDING)])
+    await db.care_assignments.create_index([("clinicId", ASCENDING), ("doctorId", ASCENDING)])
+    
+    # Audit log: who accessed a patient, and what a doctor accessed
+    await db.audit_log.create_index([("patientId", ASCENDING), ("timestamp", DESCENDING)])
+    await db.audit_log.create_index([("actorId", ASCENDING), ("timestamp", DESCENDING)])
+    
+    # Revoked access tokens are only needed until they would have expired
+    await db.revoked_tokens.create_index("expiresAt", expireAfterSeconds=0)
+    # Workers without a change stream poll for recent revocations
+    await db.revoked_tokens.create_index("revokedAt")
+    
+    # Refresh token sessions expire on their own; logout drops a whole family
+    await db.sessions.create_index("expiresAt", expireAfterSeconds=0)
+    await db.sessions.create_index("familyId")
+    await db.sessions.create_index("userId")
+    
+    # Shared rate limit buckets (RATE_LIMIT_STORE=mongo)
+    await db.rate_limits.create_index("expiresAt", expireAfterSeconds=0)
+    
+    # Slow query log: capped, so it keeps only the most recent entries
+    try:
+        await db.create_collection(
+            SLOW_QUERY_COLLECTION,
+            capped=True,
+            size=settings.SLOW_QUERY_CAPPED_BYTES
+        )
+    except CollectionInvalid:
+        pass
+    
+    # Pre-assessment questions: one question per position, so seeding is idempotent
+    try:
+        await db.pre_assessment_questions.create_index("order", unique=True)
+    except OperationFailure as e:
+        print(f"Could not create unique index on pre_assessment_questions.order: {str(e)}")
 
 def get_database():
-    return MongoDB.db 
\ No newline at end of file
+    """Database for the current tenant.
+
+    Clinics listed in TENANT_DATABASES get their own deployment; with
+    MULTI_TENANT on, collections holding clinic data are also confined to
+    the current clinic. Background jobs and scripts without a tenant get
+    unscoped access; with MULTI_TENANT on, a request must have chosen it
+    with tenant_context(None).
+    """
+    clinic_id = get_current_tenant()
+    if clinic_id is None:
+        if settings.MULTI_TENANT and not tenant_chosen():
+            raise RuntimeError("No clinic selected for this request; use tenant_context(None) for system access")
+        return MongoDB.db
+    
+    if (client := MongoDB.tenant_clients.get(clinic_id)) is not None:
+        db = client[settings.MONGODB_DB_NAME]
+    else:
+        db = MongoDB.db
+    
+    if settings.MULTI_TENANT:
+        return TenantScopedDatabase(db, clinic_id)
+    return db 
\ No newline at end of file
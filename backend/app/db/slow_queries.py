@@ -0,0 +1,166 @@
+import asyncio
+import random
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pymongo import monitoring
+from app.core import metrics
+from app.core.config import settings
+from app.core.request_context import current_route
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+# Commands explain() accepts without side effects
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+
+# Driver-added fields that explain() rejects inside the explained command
+SESSION_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern"}
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    """Record commands slower than SLOW_QUERY_THRESHOLD_MS.
+
+    Listener callbacks run on PyMongo's threads, so they only hand slow
+    commands to the event loop; a worker task there runs explain on a
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE share of them and writes the entry to the
+    capped slow_queries collection. Bounded: when the queue is full, entries
+    are dropped and counted.
+    """
+
+    def __init__(self):
+        self.client = None
+        self._pending: Dict[Any, tuple] = {}
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.SLOW_QUERY_QUEUE_SIZE)
+        self._task = self._loop.create_task(self._run())
+
+    def started(self, event):
+        if event.command_name == "explain" or event.command.get(event.command_name) == SLOW_QUERY_COLLECTION:
+            return
+        self._pending[(event.connection_id, event.request_id)] = (event.command, event.database_name, current_route())
+
+    def succeeded(self, event):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None or event.duration_micros < settings.SLOW_QUERY_THRESHOLD_MS * 1000:
+            return
+        command, database_name, route = pending
+        self._loop.call_soon_threadsafe(self._enqueue, {
+            "commandName": event.command_name,
+            "database": database_name,
+            "collection": str(command.get(event.command_name, "")),
+            "command": command,
+            "durationMs": round(event.duration_micros / 1000, 3),
+            "route": route,
+            "timestamp": datetime.utcnow()
+        })
+
+    def failed(self, event):
+        self._pending.pop((event.connection_id, event.request_id), None)
+
+    def _enqueue(self, entry: Dict[str, Any]) -> None:
+        metrics.increment("slow_queries.detected")
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            metrics.increment("slow_queries.dropped")
+
+    async def _run(self) -> None:
+        while True:
+            entry = await self._queue.get()
+            try:
+                await self._record(entry)
+            except Exception as e:
+                print(f"Error recording slow query: {str(e)}")
+
+    async def _record(self, entry: Dict[str, Any]) -> None:
+        db = self.client[entry["database"]]
+        command = {
+            key: value for key, value in entry.pop("command").items()
+            if not key.startswith("$") and key not in SESSION_FIELDS
+        }
+        entry["filter"] = _summarize(command)
+
+        if _explainable(entry["commandName"], command) and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            explain = await db.command({"explain": command, "verbosity": "executionStats"})
+            entry.update(_plan_stats(explain))
+            metrics.increment("slow_queries.explained")
+
+        await db[SLOW_QUERY_COLLECTION].insert_one(entry)
+
+    async def close(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+def _explainable(command_name: str, command: Dict[str, Any]) -> bool:
+    if command_name not in EXPLAINABLE_COMMANDS:
+        return False
+    if command_name == "aggregate":
+        # Explaining with executionStats would run the write stage
+        return not any("$merge" in stage or "$out" in stage for stage in command.get("pipeline", []))
+    return True
+
+def _summarize(command: Dict[str, Any]) -> Dict[str, Any]:
+    """The shape-defining parts of a command, without bulk payloads.
+
+    Filter and pipeline values are replaced by their type names, so patient
+    data never reaches the log.
+    """
+    summary = {}
+    for key in ("filter", "query", "pipeline"):
+        if key in command:
+            summary[key] = _shape(command[key])
+    for key in ("sort", "projection", "key", "limit", "skip"):
+        if key in command:
+            summary[key] = command[key]
+    return summary
+
+def _shape(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        # An $in over many ids is one shape, not many
+        shapes = []
+        for item in value:
+            if (shape := _shape(item)) not in shapes:
+                shapes.append(shape)
+        return shapes
+    return f"<{type(value).__name__}>"
+
+def _redact_plan(plan: Any) -> Any:
+    """A query plan with the filter values and index bounds it embeds shaped."""
+    if isinstance(plan, dict):
+        return {
+            key: _shape(item) if key in ("filter", "indexBounds", "parsedQuery") else _redact_plan(item)
+            for key, item in plan.items()
+        }
+    if isinstance(plan, list):
+        return [_redact_plan(item) for item in plan]
+    return plan
+
+def _plan_stats(explain: Dict[str, Any]) -> Dict[str, Any]:
+    stats = explain.get("executionStats")
+    planner = explain.get("queryPlanner")
+    if stats is None:
+        # Aggregations report per-stage; the $cursor stage holds the query plan
+        for stage in explain.get("stages", []):
+            if "$cursor" in stage:
+                stats = stage["$cursor"].get("executionStats")
+                planner = stage["$cursor"].get("queryPlanner")
+                break
+    if stats is None:
+        return {}
+
+    docs_examined = stats.get("totalDocsExamined", 0)
+    returned = stats.get("nReturned", 0)
+    return {
+        "winningPlan": _redact_plan((planner or {}).get("winningPlan")),
+        "docsExamined": docs_examined,
+        "keysExamined": stats.get("totalKeysExamined", 0),
+        "nReturned": returned,
+        "docsExaminedPerReturned": round(docs_examined / max(returned, 1), 2),
+        "executionTimeMs": stats.get("executionTimeMillis")
+    }
+
+def slow_query_recorder() -> Optional[SlowQueryRecorder]:
+    return SlowQueryRecorder() if settings.SLOW_QUERY_THRESHOLD_MS > 0 else None
@@ -0,0 +1,118 @@
+from typing import Any, Dict, List, Optional
+from pymongo import InsertOne, UpdateOne, UpdateMany, ReplaceOne, DeleteOne, DeleteMany
+
+# Collections whose documents carry clinicId and are filtered by it
+TENANT_SCOPED_COLLECTIONS = {"users", "assessments", "notifications"}
+
+# Collection attributes that don't touch documents, so need no scoping
+UNSCOPED_ATTRIBUTES = {
+    "name", "full_name", "database", "codec_options", "read_preference", "write_concern", "read_concern",
+    "create_index", "create_indexes", "drop_index", "index_information", "list_indexes"
+}
+
+class TenantScopedCollection:
+    """Motor collection proxy that confines every operation to one clinic.
+
+    Filters get ``clinicId`` added, inserted documents are stamped with it
+    and aggregations start with a matching ``$match``. Index management
+    passes through; any other method not wrapped here raises, so new
+    operations can't reach other clinics' documents by accident.
+    """
+
+    def __init__(self, collection, clinic_id: str):
+        self._collection = collection
+        self._clinic_id = clinic_id
+
+    def __getattr__(self, name):
+        if name in UNSCOPED_ATTRIBUTES:
+            return getattr(self._collection, name)
+        raise AttributeError(f"{name} is not scoped to a clinic; add it to TenantScopedCollection first")
+
+    def scoped(self, filter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {**(filter or {}), "clinicId": self._clinic_id}
+
+    def stamped(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        document["clinicId"] = self._clinic_id
+        return document
+
+    def find(self, filter=None, *args, **kwargs):
+        return self._collection.find(self.scoped(filter), *args, **kwargs)
+
+    async def find_one(self, filter=None, *args, **kwargs):
+        return await self._collection.find_one(self.scoped(filter), *args, **kwargs)
+
+    async def count_documents(self, filter, *args, **kwargs):
+        return await self._collection.count_documents(self.scoped(filter), *args, **kwargs)
+
+    async def distinct(self, key, filter=None, *args, **kwargs):
+        return await self._collection.distinct(key, self.scoped(filter), *args, **kwargs)
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], *args, **kwargs):
+        return self._collection.aggregate([{"$match": self.scoped()}, *pipeline], *args, **kwargs)
+
+    async def insert_one(self, document, *args, **kwargs):
+        return await self._collection.insert_one(self.stamped(document), *args, **kwargs)
+
+    async def insert_many(self, documents, *args, **kwargs):
+        return await self._collection.insert_many([self.stamped(doc) for doc in documents], *args, **kwargs)
+
+    async def update_one(self, filter, update, *args, **kwargs):
+        return await self._collection.update_one(self.scoped(filter), update, *args, **kwargs)
+
+    async def update_many(self, filter, update, *args, **kwargs):
+        return await self._collection.update_many(self.scoped(filter), update, *args, **kwargs)
+
+    async def replace_one(self, filter, replacement, *args, **kwargs):
+        return await self._collection.replace_one(self.scoped(filter), self.stamped(replacement), *args, **kwargs)
+
+    async def delete_one(self, filter, *args, **kwargs):
+        return await self._collection.delete_one(self.scoped(filter), *args, **kwargs)
+
+    async def delete_many(self, filter, *args, **kwargs):
+        return await self._collection.delete_many(self.scoped(filter), *args, **kwargs)
+
+    async def bulk_write(self, requests, *args, **kwargs):
+        return await self._collection.bulk_write([self._scope_request(request) for request in requests], *args, **kwargs)
+
+    def _scope_request(self, request):
+        if isinstance(request, InsertOne):
+            return InsertOne(self.stamped(request._doc))
+        if isinstance(request, (UpdateOne, UpdateMany)):
+            return type(request)(
+                self.scoped(request._filter),
+                request._doc,
+                upsert=request._upsert,
+                collation=request._collation,
+                array_filters=request._array_filters,
+                hint=request._hint
+            )
+        if isinstance(request, ReplaceOne):
+            return ReplaceOne(
+                self.scoped(request._filter),
+                self.stamped(request._doc),
+                upsert=request._upsert,
+                collation=request._collation,
+                hint=request._hint
+            )
+        if isinstance(request, (DeleteOne, DeleteMany)):
+            return type(request)(self.scoped(request._filter), collation=request._collation, hint=request._hint)
+        raise TypeError(f"Unsupported bulk write request: {request!r}")
+
+class TenantScopedDatabase:
+    """Motor database proxy handing out clinic-scoped collections."""
+
+    def __init__(self, db, clinic_id: str):
+        self._db = db
+        self._clinic_id = clinic_id
+
+    def __getattr__(self, name):
+        # Database methods (command, create_collection, ...) pass through
+        if name in TENANT_SCOPED_COLLECTIONS:
+            return self[name]
+        return getattr(self._db, name)
+
+    def __getitem__(self, name):
+        collection = self._db[name]
+        if name in TENANT_SCOPED_COLLECTIONS:
+            return TenantScopedCollection(collection, self._clinic_id)
+        return collection
@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import (
     users,
@@ -8,15 +9,52 @@ from app.routers import (
     stress_assessment,
     anxiety_assessment,
     ptsd_assessment,
-    doctor
+    doctor,
+    analytics,
+    admin
 )
 from app.core.config import settings
-from app.db.mongodb import connect_to_mongo, close_mongo_connection
+from app.core import cache, invalidation, metrics
+from app.core.compression import CompressionMiddleware
+from app.core.tracing import TracingMiddleware, TracedJSONResponse
+from app.core.request_context import RequestContextMiddleware
+from app.db.mongodb import connect_to_mongo, close_mongo_connection, create_indexes, warm_connections
+from app.core.auth import load_revoked_tokens, start_revocation_polling, stop_revocation_polling, get_current_admin, require_tenant
+from app.services.notification_retention import start_archiver, stop_archiver
+from app.services.question_catalog import seed_questions, refresh_questions
+from app.services.analytics import start_rollups, stop_rollups
+from app.services.audit import start_flusher, stop_flusher
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Each worker is fully warmed up before the server lets it take traffic
+    await connect_to_mongo()
+    await warm_connections()
+    await create_indexes()
+    await seed_questions()
+    await refresh_questions()
+    await load_revoked_tokens()
+    await cache.warm()
+    invalidation.start_bus()
+    start_revocation_polling()
+    start_archiver()
+    start_rollups()
+    start_flusher()
+    yield
+    await stop_revocation_polling()
+    await invalidation.stop_bus()
+    await stop_archiver()
+    await stop_rollups()
+    await stop_flusher()
+    await cache.close()
+    await close_mongo_connection()
 
 app = FastAPI(
     title="Mental Health Assessment API",
     description="API for managing mental health assessments and user data",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TracedJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -28,23 +66,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses
+app.add_middleware(CompressionMiddleware)
+
+# Trace sampled requests; spans cover everything but the request context below
+app.add_middleware(TracingMiddleware)
+
+# Outermost: expose the current route to the slow query log and start
+# each request without unscoped database access
+app.add_middleware(RequestContextMiddleware)
+
 # Include routers
 app.include_router(users.router, prefix="/api/users", tags=["users"])
-app.include_router(assessments.router, prefix="/api/assessments", tags=["assessments"])
-app.include_router(notifications.router, prefix="/api/notifications", tags=["notifications"])
+app.include_router(assessments.router, prefix="/api/assessments", tags=["assessments"], dependencies=[Depends(require_tenant)])
+app.include_router(notifications.router, prefix="/api/notifications", tags=["notifications"], dependencies=[Depends(require_tenant)])
 app.include_router(pre_assessment.router, prefix="/api/pre-assessment", tags=["pre-assessment"])
 app.include_router(stress_assessment.router, prefix="/api/stress-assessment", tags=["stress-assessment"])
 app.include_router(anxiety_assessment.router, prefix="/api/anxiety-assessment", tags=["anxiety-assessment"])
 app.include_router(ptsd_assessment.router, prefix="/api/ptsd-assessment", tags=["ptsd-assessment"])
 app.include_router(doctor.router, prefix="/api/doctor", tags=["doctor"])
+app.include_router(analytics.router, prefix="/api/doctor/analytics", tags=["analytics"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
-@app.on_event("startup")
-async def startup_event():
-    await connect_to_mongo()
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    await close_mongo_connection()
+@app.get("/api/metrics", dependencies=[Depends(get_current_admin)])
+async def get_metrics():
+    return metrics.snapshot()
 
 @app.get("/")
 async def root():
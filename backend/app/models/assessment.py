@@ -21,7 +21,7 @@ class PyObjectId:
                 ])
             ]),
             serialization=core_schema.plain_serializer_function_ser_schema(
-                lambda x: str(x),
+                str,
                 return_schema=core_schema.str_schema(),
                 when_used='json'
             ),
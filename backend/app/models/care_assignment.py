@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class CareAssignmentBase(BaseModel):
+    patientId: str
+    clinicId: str
+
+class CareAssignmentCreate(BaseModel):
+    doctorId: str
+    # Admins name the patient; patients can only grant access to themselves
+    patientId: Optional[str] = None
+
+class CareAssignment(CareAssignmentBase):
+    id: str
+    doctorId: str
+    createdAt: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
 from datetime import datetime
 
 class NotificationBase(BaseModel):
@@ -20,4 +20,26 @@ class Notification(NotificationBase):
     createdAt: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+# Broadcast schemas
+class BroadcastTarget(BaseModel):
+    # Broadcasts reach the patients on the requesting doctor's panel.
+    # Restrict to patients who have not completed all of these assessment types
+    pendingAssessmentTypes: List[Literal['pre', 'stress', 'anxiety', 'ptsd']] = Field(default_factory=list)
+
+class NotificationBroadcast(BaseModel):
+    type: str
+    message: str
+    target: BroadcastTarget
+
+class BroadcastJob(BaseModel):
+    id: str
+    status: Literal['pending', 'running', 'completed', 'failed']
+    createdBy: str
+    created: int = 0
+    batches: int = 0
+    notificationsPerSecond: float = 0.0
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
+    error: Optional[str] = None
@@ -12,6 +12,8 @@ class UserBase(BaseModel):
     phoneNumber: Optional[str] = None
 
 class UserCreate(UserBase):
+    # The clinic is not chosen here: sign up joins DEFAULT_CLINIC_ID, and
+    # accounts created by an admin join the admin's clinic
     password: str
 
 class UserUpdate(BaseModel):
@@ -25,6 +27,7 @@ class UserUpdate(BaseModel):
 
 class User(UserBase):
     id: str
+    clinicId: Optional[str] = None
     createdAt: datetime
     updatedAt: datetime
 
@@ -36,6 +39,12 @@ class User(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+    # Same role as on login: selects the clinic's database
+    clinicId: Optional[str] = None
 
 class TokenData(BaseModel):
     email: Optional[str] = None
@@ -43,4 +52,6 @@ class TokenData(BaseModel):
 
 class UserLogin(BaseModel):
     email: EmailStr
-    password: str 
\ No newline at end of file
+    password: str
+    # Needed when the clinic has its own database or emails repeat across clinics
+    clinicId: Optional[str] = None 
\ No newline at end of file
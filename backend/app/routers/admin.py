@@ -0,0 +1,90 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks, status
+from fastapi.responses import PlainTextResponse
+from typing import Literal, Optional
+from app.core.auth import get_current_admin
+from app.core.config import settings
+from app.core.serialization import serialize_doc
+from app.core.profiler import SamplingProfiler
+from app.db.mongodb import get_database
+from app.db.slow_queries import SLOW_QUERY_COLLECTION
+from app.services import parquet_export
+import asyncio
+import threading
+
+router = APIRouter()
+
+_profile_lock = asyncio.Lock()
+
+@router.post("/profile")
+async def profile_worker(
+    seconds: float = Query(10, gt=0),
+    format: Literal["collapsed", "speedscope"] = "collapsed",
+    current_user: dict = Depends(get_current_admin)
+):
+    """Sample this worker's event loop for a number of seconds (admin only)"""
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Profiles are limited to {settings.PROFILER_MAX_SECONDS} seconds"
+        )
+    if _profile_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker"
+        )
+    
+    async with _profile_lock:
+        # This handler runs on the event loop thread, which serves all requests
+        profiler = SamplingProfiler(threading.get_ident(), settings.PROFILER_INTERVAL_MS / 1000)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+    
+    if format == "speedscope":
+        return profiler.speedscope()
+    return PlainTextResponse(profiler.collapsed())
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    route: Optional[str] = None,
+    collection: Optional[str] = None,
+    explained: bool = False,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: dict = Depends(get_current_admin)
+):
+    """Browse the most recent slow queries (admin only)"""
+    db = get_database()
+    query = {}
+    if route:
+        query["route"] = route
+    if collection:
+        query["collection"] = collection
+    if explained:
+        query["docsExamined"] = {"$exists": True}
+    
+    # Capped collections keep insertion order; newest first
+    entries = await db[SLOW_QUERY_COLLECTION].find(query).sort("$natural", -1).limit(limit).to_list(None)
+    return [serialize_doc(entry) for entry in entries]
+
+async def run_parquet_export():
+    try:
+        results = await parquet_export.export_all()
+        print(f"Parquet export finished: {results}")
+    except Exception as e:
+        print(f"Error exporting assessments to Parquet: {str(e)}")
+
+@router.post("/exports/parquet", status_code=status.HTTP_202_ACCEPTED)
+async def start_parquet_export(
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_admin)
+):
+    """Export newly completed assessments to the Parquet dataset in the background (admin only)"""
+    if parquet_export.export_running():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An export is already running on this worker"
+        )
+    background_tasks.add_task(run_parquet_export)
+    return {"status": "started", "directory": settings.EXPORT_PARQUET_DIR}
\ No newline at end of file
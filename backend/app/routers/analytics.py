@@ -0,0 +1,112 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from typing import Optional, Dict, Any
+from app.db.mongodb import get_database
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.tenancy import get_current_tenant, tenant_context, database_scope
+from app.services.analytics import FUNNEL_STAGES, refresh_rollups
+from datetime import datetime
+
+router = APIRouter()
+
+def require_doctor(current_user: dict = Depends(get_current_user)) -> dict:
+    if current_user["role"] != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can access analytics"
+        )
+    return current_user
+
+def clinic_filter(field: str) -> Dict[str, Any]:
+    """Rollups in a shared database hold every clinic; keep the caller's."""
+    if settings.MULTI_TENANT:
+        return {field: get_current_tenant()}
+    return {}
+
+def day_range(start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    query: Dict[str, Any] = clinic_filter("_id.clinicId")
+    if start:
+        query.setdefault("_id.day", {})["$gte"] = start
+    if end:
+        query.setdefault("_id.day", {})["$lte"] = end
+    return query
+
+@router.get("/daily")
+async def get_daily_counts(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    assessment_type: Optional[str] = None,
+    current_user: dict = Depends(require_doctor)
+):
+    """Get assessment counts per type per day"""
+    db = get_database()
+    query = day_range(start, end)
+    if assessment_type:
+        query["_id.type"] = assessment_type
+    
+    days = await db.analytics_daily.aggregate([
+        {"$match": query},
+        {"$group": {
+            "_id": {"day": "$_id.day", "type": "$_id.type"},
+            "count": {"$sum": "$count"},
+            "scoreSum": {"$sum": "$scoreSum"}
+        }},
+        {"$sort": {"_id.day": 1, "_id.type": 1}}
+    ]).to_list(None)
+    
+    return [
+        {
+            "day": day["_id"]["day"].date().isoformat(),
+            "type": day["_id"]["type"],
+            "count": day["count"],
+            "avgScore": round(day["scoreSum"] / day["count"], 2) if day["count"] else None
+        }
+        for day in days
+    ]
+
+@router.get("/severity")
+async def get_severity_distribution(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: dict = Depends(require_doctor)
+):
+    """Get the severity distribution per assessment type"""
+    db = get_database()
+    rows = await db.analytics_daily.aggregate([
+        {"$match": day_range(start, end)},
+        {"$group": {
+            "_id": {"type": "$_id.type", "severity": "$_id.severity"},
+            "count": {"$sum": "$count"}
+        }}
+    ]).to_list(None)
+    
+    distribution: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        distribution.setdefault(row["_id"]["type"], {})[row["_id"]["severity"]] = row["count"]
+    return distribution
+
+@router.get("/funnel")
+async def get_completion_funnel(current_user: dict = Depends(require_doctor)):
+    """Get how many patients completed each stage of pre → stress → anxiety → ptsd"""
+    db = get_database()
+    funnel = []
+    for i, stage in enumerate(FUNNEL_STAGES):
+        count = await db.analytics_funnel.count_documents({
+            **clinic_filter("clinicId"),
+            "types": {"$all": FUNNEL_STAGES[:i + 1]}
+        })
+        funnel.append({"stage": stage, "patients": count})
+    return funnel
+
+@router.post("/refresh")
+async def refresh_analytics(current_user: dict = Depends(require_doctor)):
+    """Process newly completed assessments into the rollups now"""
+    # The watermark covers the whole database, so process it unscoped
+    with tenant_context(database_scope(get_current_tenant())):
+        result = await refresh_rollups()
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A rollup is already running"
+        )
+    return result
@@ -9,6 +9,10 @@ from app.models.assessment import (
 )
 from app.db.mongodb import get_database
 from app.core.auth import get_current_user
+from app.core.etag import bump_user_versions
+from app.services.care_assignments import can_view_patient, get_patient_ids
+from app.services.triage import record_assessment
+from app.services.instruments import question_texts, stored_questions, hydrate
 from bson import ObjectId
 from datetime import datetime
 
@@ -31,15 +35,7 @@ class AssessmentQuestion(BaseModel):
     questionText: str
     score: int
 
-GAD7_QUESTIONS = [
-    "Feeling nervous, anxious, or on edge",
-    "Not being able to stop or control worrying",
-    "Worrying too much about different things",
-    "Trouble relaxing",
-    "Being so restless that it's hard to sit still",
-    "Becoming easily annoyed or irritable",
-    "Feeling afraid as if something awful might happen"
-]
+GAD7_QUESTIONS = question_texts("anxiety")
 
 router = APIRouter()
 
@@ -66,7 +62,7 @@ async def submit_anxiety_assessment(
         "userId": str(current_user["_id"]),
         "assessmentType": "anxiety",
         "status": "completed",
-        "questions": questions,
+        **stored_questions("anxiety", questions),
         "score": form_data.totalScore,
         "severity": form_data.severity,
         "startedAt": datetime.utcnow(),
@@ -74,9 +70,11 @@ async def submit_anxiety_assessment(
     }
     
     result = await db.assessments.insert_one(assessment_dict)
+    await bump_user_versions(assessment_dict["userId"])
+    await record_assessment(assessment_dict)
     
     if (created_assessment := await db.assessments.find_one({"_id": result.inserted_id})) is not None:
-        return serialize_doc(created_assessment)
+        return serialize_doc(hydrate(created_assessment))
     
     raise HTTPException(status_code=500, detail="Failed to create assessment")
 
@@ -86,7 +84,7 @@ async def get_user_assessments(
     current_user: dict = Depends(get_current_user)
 ):
     """Get all anxiety assessments for a user"""
-    if current_user["role"] != "doctor" and str(current_user["_id"]) != user_id:
+    if not await can_view_patient(current_user, user_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view these assessments"
@@ -97,7 +95,7 @@ async def get_user_assessments(
         "userId": user_id,
         "assessmentType": "anxiety"
     }).to_list(None)
-    return [serialize_doc(assessment) for assessment in assessments]
+    return [serialize_doc(hydrate(assessment)) for assessment in assessments]
 
 @router.get("/submission/{assessment_id}")
 async def get_assessment(
@@ -111,18 +109,18 @@ async def get_assessment(
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    # Only allow doctors or the assessment owner to view
-    if current_user["role"] != "doctor" and assessment["userId"] != str(current_user["_id"]):
+    # Only allow the patient's doctors or the assessment owner to view
+    if not await can_view_patient(current_user, assessment["userId"]):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view this assessment"
         )
     
-    return serialize_doc(assessment)
+    return serialize_doc(hydrate(assessment))
 
 @router.get("/all-results", response_model=List[Dict[str, Any]])
 async def get_all_assessments(current_user: dict = Depends(get_current_user)):
-    """Get all anxiety assessments (doctor only)"""
+    """Get all anxiety assessments for the doctor's patients (doctor only)"""
     if current_user["role"] != "doctor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -130,8 +128,10 @@ async def get_all_assessments(current_user: dict = Depends(get_current_user)):
         )
     
     db = get_database()
+    panel = await get_patient_ids(str(current_user["_id"]))
     assessments = await db.assessments.find({
+        "userId": {"$in": panel},
         "assessmentType": "anxiety",
         "status": "completed"
     }).to_list(None)
-    return [serialize_doc(assessment) for assessment in assessments] 
\ No newline at end of file
+    return [serialize_doc(hydrate(assessment)) for assessment in assessments] 
\ No newline at end of file
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+from typing import List, Dict, Literal, Optional
 from app.models.assessment import Assessment, AssessmentCreate, AssessmentUpdate
 from app.db.mongodb import get_database
+from app.core.etag import conditional_get, bump_user_versions
+from app.core.serialization import list_response
+from app.core.auth import get_current_user
+from app.services.assessment_import import import_assessments
+from app.services.care_assignments import get_patient_ids
+from app.services.triage import record_assessment, forget_assessment
 from bson import ObjectId
 from datetime import datetime
 
@@ -11,7 +17,29 @@ router = APIRouter()
 async def get_assessments():
     db = get_database()
     assessments = await db.assessments.find().to_list(length=None)
-    return assessments
+    return list_response(Assessment, assessments)
+
+@router.post("/import")
+async def import_assessment_results(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Bulk import historical results for the doctor's patients from NDJSON or CSV"""
+    if current_user["role"] != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can import assessments"
+        )
+    
+    # The body is read as it arrives, never held in full
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    panel = await get_patient_ids(str(current_user["_id"]))
+    try:
+        return await import_assessments(request.stream(), format, panel)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/{assessment_id}", response_model=Assessment)
 async def get_assessment(assessment_id: str):
@@ -24,7 +52,7 @@ async def get_assessment(assessment_id: str):
 async def get_user_assessments(user_id: str):
     db = get_database()
     assessments = await db.assessments.find({"userId": user_id}).to_list(length=None)
-    return assessments
+    return list_response(Assessment, assessments)
 
 @router.post("/", response_model=Assessment)
 async def create_assessment(assessment: AssessmentCreate):
@@ -32,6 +60,8 @@ async def create_assessment(assessment: AssessmentCreate):
     assessment_dict = assessment.model_dump()
     assessment_dict["startedAt"] = datetime.utcnow()
     result = await db.assessments.insert_one(assessment_dict)
+    await bump_user_versions(assessment_dict["userId"])
+    await record_assessment(assessment_dict)
     
     if (created_assessment := await db.assessments.find_one({"_id": result.inserted_id})) is not None:
         return created_assessment
@@ -42,28 +72,33 @@ async def update_assessment(assessment_id: str, assessment: AssessmentUpdate):
     db = get_database()
     assessment_dict = assessment.model_dump(exclude_unset=True)
     
-    if (await db.assessments.find_one({"_id": ObjectId(assessment_id)})) is None:
+    if (existing := await db.assessments.find_one({"_id": ObjectId(assessment_id)})) is None:
         raise HTTPException(status_code=404, detail="Assessment not found")
         
     await db.assessments.update_one(
         {"_id": ObjectId(assessment_id)},
         {"$set": assessment_dict}
     )
+    await bump_user_versions(existing["userId"])
     
     if (updated_assessment := await db.assessments.find_one({"_id": ObjectId(assessment_id)})) is not None:
+        await record_assessment(updated_assessment)
         return updated_assessment
     raise HTTPException(status_code=500, detail="Failed to update assessment")
 
 @router.delete("/{assessment_id}")
 async def delete_assessment(assessment_id: str):
     db = get_database()
-    if (await db.assessments.find_one({"_id": ObjectId(assessment_id)})) is None:
+    if (existing := await db.assessments.find_one({"_id": ObjectId(assessment_id)})) is None:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
     await db.assessments.delete_one({"_id": ObjectId(assessment_id)})
+    if existing.get("status") == "completed" and existing.get("assessmentType"):
+        await forget_assessment(existing["userId"], existing["assessmentType"])
+    await bump_user_versions(existing["userId"])
     return {"message": "Assessment deleted successfully"}
 
-@router.get("/status/{user_id}", response_model=Dict[str, str])
+@router.get("/status/{user_id}", response_model=Dict[str, str], dependencies=[Depends(conditional_get("user:{user_id}"))])
 async def get_assessment_status(user_id: str):
     """Get the status of all assessments for a user."""
     db = get_database()
@@ -1,18 +1,126 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+from typing import List, Literal
 from app.models.user import User
 from app.models.assessment import Assessment
+from app.models.care_assignment import CareAssignment, CareAssignmentCreate
 from app.db.mongodb import get_database
 from app.core.auth import get_current_user
+from app.core.tenancy import get_current_tenant
+from app.core.etag import doctor_conditional_get, bump_versions, roster_key, ROSTER_KEY
+from app.core.rate_limit import rate_limit_by_user, concurrency_limit
+from app.services.care_assignments import get_patient_ids, is_assigned
+from app.services import audit
+from app.services.instruments import hydrate
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 from ..ai import generate_patient_summary
 
 router = APIRouter(tags=["doctor"])
 
-@router.get("/patients", response_model=List[dict])
+def transform_assignment(assignment_doc):
+    assignment = dict(assignment_doc)
+    assignment["id"] = str(assignment.pop("_id"))
+    return assignment
+
+def audit_access(request: Request, current_user: dict, patient_id: str) -> None:
+    """Record a doctor's access to patient data in the audit log"""
+    audit.record(str(current_user["_id"]), patient_id, f"{request.method} {request.scope['route'].path}")
+
+async def ensure_assigned(current_user: dict, patient_id: str) -> None:
+    """Hide patients outside the doctor's panel as not found"""
+    if not await is_assigned(str(current_user["_id"]), patient_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found"
+        )
+
+@router.get("/assignments", response_model=List[CareAssignment])
+async def get_assignments(current_user: dict = Depends(get_current_user)):
+    """Get the doctor's care assignments"""
+    if current_user["role"] != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can access care assignments"
+        )
+    
+    db = get_database()
+    assignments = await db.care_assignments.find({"doctorId": str(current_user["_id"])}).to_list(None)
+    return [transform_assignment(assignment) for assignment in assignments]
+
+@router.post("/assignments", response_model=CareAssignment)
+async def create_assignment(
+    assignment: CareAssignmentCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Give a doctor access to a patient (the patient themselves or an admin)"""
+    if current_user.get("isAdmin") is True and assignment.patientId is not None:
+        patient_id = assignment.patientId
+    elif current_user["role"] == "patient" and assignment.patientId in (None, str(current_user["_id"])):
+        patient_id = str(current_user["_id"])
+    else:
+        # Doctors can't add patients to their own panel
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the patient or an admin can create care assignments"
+        )
+    
+    db = get_database()
+    if not await db.users.find_one({"_id": ObjectId(patient_id), "role": "patient"}, projection={"_id": 1}):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found"
+        )
+    if not await db.users.find_one({"_id": ObjectId(assignment.doctorId), "role": "doctor"}, projection={"_id": 1}):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found"
+        )
+    
+    assignment_dict = {
+        "doctorId": assignment.doctorId,
+        "patientId": patient_id,
+        # The caller's clinic, from their token
+        "clinicId": get_current_tenant(),
+        "createdAt": datetime.utcnow()
+    }
+    
+    try:
+        result = await db.care_assignments.insert_one(assignment_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Patient is already assigned to this doctor")
+    await bump_versions(roster_key(assignment_dict["doctorId"]))
+    
+    if (created_assignment := await db.care_assignments.find_one({"_id": result.inserted_id})) is not None:
+        return transform_assignment(created_assignment)
+    raise HTTPException(status_code=500, detail="Failed to create assignment")
+
+@router.delete("/assignments/{patient_id}")
+async def delete_assignment(
+    patient_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Remove a patient from the doctor's panel"""
+    if current_user["role"] != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can manage care assignments"
+        )
+    
+    db = get_database()
+    result = await db.care_assignments.delete_one({
+        "doctorId": str(current_user["_id"]),
+        "patientId": patient_id
+    })
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    
+    await bump_versions(roster_key(str(current_user["_id"])))
+    return {"message": "Assignment deleted successfully"}
+
+@router.get("/patients", response_model=List[dict], dependencies=[Depends(doctor_conditional_get(ROSTER_KEY))])
 async def get_patients(current_user: dict = Depends(get_current_user)):
-    """Get all patients for a doctor who have completed assessments"""
+    """Get the doctor's assigned patients who have completed assessments"""
     if current_user["role"] != "doctor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -21,10 +129,13 @@ async def get_patients(current_user: dict = Depends(get_current_user)):
     
     db = get_database()
     
-    # Get all completed assessments
+    # Only the doctor's own panel, so cost follows panel size
+    panel = await get_patient_ids(str(current_user["_id"]))
+    
+    # Get panel patients with completed assessments
     completed_assessments = await db.assessments.distinct(
         "userId",
-        {"status": "completed"}
+        {"userId": {"$in": panel}, "status": "completed"}
     )
     
     # Get all users with role 'patient' who have completed assessments
@@ -82,7 +193,57 @@ async def get_patients(current_user: dict = Depends(get_current_user)):
     
     return patient_list
 
-@router.get("/patients/{patient_id}", response_model=dict)
+@router.get("/triage", response_model=List[dict])
+async def get_triage_queue(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(25, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get patients ordered by latest severity, highest risk first"""
+    if current_user["role"] != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can access the triage queue"
+        )
+    
+    db = get_database()
+    
+    # Only the doctor's own panel, ordered by severity and recency
+    panel = await get_patient_ids(str(current_user["_id"]))
+    entries = await db.triage.find({"_id": {"$in": panel}}).sort([
+        ("severityRank", -1),
+        ("latestAssessmentAt", -1)
+    ]).skip(skip).limit(limit).to_list(None)
+    
+    patients = await db.users.find(
+        {"_id": {"$in": [ObjectId(entry["_id"]) for entry in entries]}, "role": "patient"},
+        projection={"firstName": 1, "lastName": 1, "email": 1}
+    ).to_list(None)
+    patients_by_id = {str(patient["_id"]): patient for patient in patients}
+    
+    queue = []
+    for entry in entries:
+        if (patient := patients_by_id.get(entry["_id"])) is None:
+            continue
+        queue.append({
+            "id": entry["_id"],
+            "name": f"{patient.get('firstName', '')} {patient.get('lastName', '')}".strip() or "Unknown",
+            "email": patient.get("email", ""),
+            "severityRank": entry.get("severityRank", 0),
+            "lastAssessment": entry["latestAssessmentAt"].isoformat() if entry.get("latestAssessmentAt") else None,
+            "instruments": {
+                assessment_type: {
+                    "severity": result["severity"],
+                    "score": result.get("score"),
+                    "completedAt": result["completedAt"].isoformat() if result.get("completedAt") else None
+                }
+                for assessment_type, result in entry.get("instruments", {}).items()
+            }
+        })
+    
+    return queue
+
+@router.get("/patients/{patient_id}", response_model=dict, dependencies=[Depends(doctor_conditional_get("user:{patient_id}"))])
 async def get_patient_details(
     patient_id: str,
     current_user: dict = Depends(get_current_user)
@@ -94,6 +255,9 @@ async def get_patient_details(
             detail="Only doctors can access patient details"
         )
     
+    # Access was audited by doctor_conditional_get, 304s included
+    await ensure_assigned(current_user, patient_id)
+    
     db = get_database()
     
     # Get patient information
@@ -119,7 +283,7 @@ async def get_patient_details(
             "score": assessment.get("score", 0),
             "severity": assessment.get("severity", "Not Available"),
             "completedAt": assessment["completedAt"].isoformat() if assessment.get("completedAt") else None,
-            "questions": assessment.get("questions", [])
+            "questions": hydrate(assessment).get("questions", [])
         })
     
     # Create detailed patient info
@@ -143,9 +307,13 @@ async def get_patient_details(
     
     return patient_details
 
-@router.get("/patients/{patient_id}/ai-summary")
+@router.get(
+    "/patients/{patient_id}/ai-summary",
+    dependencies=[Depends(rate_limit_by_user("ai_summary")), Depends(concurrency_limit("ai_summary"))]
+)
 async def get_patient_ai_summary(
     patient_id: str,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """Generate an AI summary for a specific patient"""
@@ -155,6 +323,9 @@ async def get_patient_ai_summary(
             detail="Only doctors can access patient summaries"
         )
     
+    await ensure_assigned(current_user, patient_id)
+    audit_access(request, current_user, patient_id)
+    
     db = get_database()
     
     # Get patient information
@@ -174,4 +345,81 @@ async def get_patient_ai_summary(
     # Generate AI summary
     summary = await generate_patient_summary(patient, assessments)
     
-    return {"summary": summary} 
\ No newline at end of file
+    return {"summary": summary}
+
+@router.get("/patients/{patient_id}/trends", response_model=dict, dependencies=[Depends(doctor_conditional_get("user:{patient_id}"))])
+async def get_patient_trends(
+    patient_id: str,
+    bucket: Literal["week", "month"] = "week",
+    window: int = Query(3, ge=1, le=12),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get per-instrument score series for a patient, bucketed by week or month"""
+    if current_user["role"] != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can access patient trends"
+        )
+    
+    # Access was audited by doctor_conditional_get, 304s included
+    await ensure_assigned(current_user, patient_id)
+    
+    db = get_database()
+    
+    if not await db.users.find_one({"_id": ObjectId(patient_id), "role": "patient"}, projection={"_id": 1}):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found"
+        )
+    
+    # Served by the {userId, assessmentType, completedAt} index
+    pipeline = [
+        {"$match": {
+            "userId": patient_id,
+            "status": "completed",
+            "completedAt": {"$type": "date"},
+            "score": {"$type": "number"}
+        }},
+        {"$group": {
+            "_id": {
+                "type": "$assessmentType",
+                "bucket": {"$dateTrunc": {"date": "$completedAt", "unit": bucket}}
+            },
+            "count": {"$sum": 1},
+            "avgScore": {"$avg": "$score"},
+            "minScore": {"$min": "$score"},
+            "maxScore": {"$max": "$score"}
+        }},
+        {"$setWindowFields": {
+            "partitionBy": "$_id.type",
+            "sortBy": {"_id.bucket": 1},
+            "output": {
+                "movingAverage": {
+                    "$avg": "$avgScore",
+                    "window": {"documents": [-(window - 1), 0]}
+                },
+                "previousScore": {"$shift": {"output": "$avgScore", "by": -1}}
+            }
+        }},
+        {"$sort": {"_id.type": 1, "_id.bucket": 1}}
+    ]
+    
+    series = {}
+    async for point in db.assessments.aggregate(pipeline):
+        previous = point.get("previousScore")
+        series.setdefault(point["_id"]["type"], []).append({
+            "bucket": point["_id"]["bucket"].isoformat(),
+            "count": point["count"],
+            "avgScore": round(point["avgScore"], 2),
+            "minScore": point["minScore"],
+            "maxScore": point["maxScore"],
+            "movingAverage": round(point["movingAverage"], 2),
+            "delta": round(point["avgScore"] - previous, 2) if previous is not None else None
+        })
+    
+    return {
+        "patientId": patient_id,
+        "bucket": bucket,
+        "window": window,
+        "series": series
+    }
\ No newline at end of file
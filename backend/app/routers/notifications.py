@@ -1,12 +1,26 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, status
 from typing import List
-from app.models.notification import Notification, NotificationCreate, NotificationUpdate
+from app.models.notification import (
+    Notification,
+    NotificationCreate,
+    NotificationUpdate,
+    NotificationBroadcast,
+    BroadcastJob
+)
 from app.db.mongodb import get_database
+from app.core.auth import get_current_user
+from app.services import notification_broadcast
+from app.services.care_assignments import can_view_patient
 from bson import ObjectId
 from datetime import datetime
 
 router = APIRouter()
 
+def transform_notification(notification_doc):
+    notification = dict(notification_doc)
+    notification["id"] = str(notification.pop("_id"))
+    return notification
+
 @router.get("/", response_model=List[Notification])
 async def get_notifications():
     db = get_database()
@@ -32,6 +46,27 @@ async def get_unread_notifications(user_id: str):
     notifications = await db.notifications.find({"userId": user_id, "read": False}).to_list(length=None)
     return notifications
 
+@router.get("/user/{user_id}/archive", response_model=List[Notification])
+async def get_archived_notifications(
+    user_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """Page through a user's archived notifications, newest first"""
+    # Users see their own archive, doctors those of their patients
+    if not await can_view_patient(current_user, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view these notifications"
+        )
+    
+    db = get_database()
+    notifications = await db.notifications_archive.find(
+        {"userId": user_id}
+    ).sort("createdAt", -1).skip(skip).limit(limit).to_list(length=None)
+    return [transform_notification(notification) for notification in notifications]
+
 @router.post("/", response_model=Notification)
 async def create_notification(notification: NotificationCreate):
     db = get_database()
@@ -43,10 +78,45 @@ async def create_notification(notification: NotificationCreate):
         return created_notification
     raise HTTPException(status_code=500, detail="Failed to create notification")
 
+@router.post("/broadcast", response_model=BroadcastJob, status_code=status.HTTP_202_ACCEPTED)
+async def broadcast_notification(
+    broadcast: NotificationBroadcast,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    """Fan out a notification to every user matching the target (doctor only)"""
+    if current_user["role"] != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can broadcast notifications"
+        )
+    
+    job = await notification_broadcast.create_job(str(current_user["_id"]))
+    background_tasks.add_task(notification_broadcast.run_broadcast, job["id"], broadcast)
+    return job
+
+@router.get("/broadcast/{job_id}", response_model=BroadcastJob)
+async def get_broadcast_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get progress and throughput of a broadcast job"""
+    if (job := await notification_broadcast.get_job(job_id)) is None:
+        raise HTTPException(status_code=404, detail="Broadcast job not found")
+    if job["createdBy"] != str(current_user["_id"]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view this broadcast job"
+        )
+    return job
+
 @router.put("/{notification_id}", response_model=Notification)
 async def update_notification(notification_id: str, notification: NotificationUpdate):
     db = get_database()
     notification_dict = notification.model_dump(exclude_unset=True)
+    # readAt drives the TTL expiry of read notifications
+    if notification_dict.get("read"):
+        notification_dict["readAt"] = datetime.utcnow()
     
     if (await db.notifications.find_one({"_id": ObjectId(notification_id)})) is None:
         raise HTTPException(status_code=404, detail="Notification not found")
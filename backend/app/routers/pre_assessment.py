@@ -5,29 +5,90 @@ from app.models.assessment import (
     QuestionCreate,
     Assessment,
     AssessmentCreate,
-    PreAssessmentFormData,
-    DEFAULT_QUESTIONS
+    PreAssessmentFormData
 )
 from app.db.mongodb import get_database
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_admin
+from app.core.etag import bump_user_versions
+from app.core.serialization import list_response
+from app.core.tenancy import tenant_context
+from app.services.care_assignments import can_view_patient
+from app.services import question_catalog
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 
 router = APIRouter()
 
+def _catalog_database():
+    # The catalog is shared by every clinic; question_catalog reads it unscoped
+    with tenant_context(None):
+        return get_database()
+
 @router.get("/questions", response_model=List[Question])
 async def get_pre_assessment_questions():
     """Get all pre-assessment questions"""
-    db = get_database()
-    questions = await db.pre_assessment_questions.find().to_list(None)
+    # Seeded and loaded at startup; served from the shared cache
+    return await question_catalog.get_questions()
+
+@router.post("/questions", response_model=Question)
+async def create_pre_assessment_question(
+    question: QuestionCreate,
+    current_user: dict = Depends(get_current_admin)
+):
+    """Add a pre-assessment question (admin only)"""
+    db = _catalog_database()
+    if await db.pre_assessment_questions.find_one({"order": question.order}):
+        raise HTTPException(status_code=400, detail="A question with this order already exists")
+    
+    try:
+        result = await db.pre_assessment_questions.insert_one(question.model_dump())
+    except DuplicateKeyError:
+        # Another question took this order since the check above
+        raise HTTPException(status_code=400, detail="A question with this order already exists")
+    await question_catalog.refresh_questions()
+    
+    if (created_question := await db.pre_assessment_questions.find_one({"_id": result.inserted_id})) is not None:
+        return created_question
+    raise HTTPException(status_code=500, detail="Failed to create question")
+
+@router.put("/questions/{question_id}", response_model=Question)
+async def update_pre_assessment_question(
+    question_id: str,
+    question: QuestionCreate,
+    current_user: dict = Depends(get_current_admin)
+):
+    """Replace a pre-assessment question (admin only)"""
+    db = _catalog_database()
+    if (await db.pre_assessment_questions.find_one({"_id": ObjectId(question_id)})) is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    
+    try:
+        await db.pre_assessment_questions.replace_one(
+            {"_id": ObjectId(question_id)},
+            question.model_dump()
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="A question with this order already exists")
+    await question_catalog.refresh_questions()
     
-    # If no questions exist, create default questions
-    if not questions:
-        for question in DEFAULT_QUESTIONS:
-            await db.pre_assessment_questions.insert_one(question)
-        questions = await db.pre_assessment_questions.find().to_list(None)
+    if (updated_question := await db.pre_assessment_questions.find_one({"_id": ObjectId(question_id)})) is not None:
+        return updated_question
+    raise HTTPException(status_code=500, detail="Failed to update question")
+
+@router.delete("/questions/{question_id}")
+async def delete_pre_assessment_question(
+    question_id: str,
+    current_user: dict = Depends(get_current_admin)
+):
+    """Delete a pre-assessment question (admin only)"""
+    db = _catalog_database()
+    if (await db.pre_assessment_questions.find_one({"_id": ObjectId(question_id)})) is None:
+        raise HTTPException(status_code=404, detail="Question not found")
     
-    return questions
+    await db.pre_assessment_questions.delete_one({"_id": ObjectId(question_id)})
+    await question_catalog.refresh_questions()
+    return {"message": "Question deleted successfully"}
 
 @router.post("/submit", response_model=Assessment)
 async def submit_pre_assessment(
@@ -55,6 +116,7 @@ async def submit_pre_assessment(
     }
     
     result = await db.assessments.insert_one(assessment_dict)
+    await bump_user_versions(assessment_dict["userId"])
     
     if (created_assessment := await db.assessments.find_one({"_id": result.inserted_id})) is not None:
         return created_assessment
@@ -67,8 +129,8 @@ async def get_user_submissions(
     current_user: dict = Depends(get_current_user)
 ):
     """Get all pre-assessment submissions for a user"""
-    # Allow doctors to view any patient's submissions or users to view their own
-    if current_user["role"] != "doctor" and str(current_user["_id"]) != user_id:
+    # Allow doctors to view their patients' submissions or users to view their own
+    if not await can_view_patient(current_user, user_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view these submissions"
@@ -79,7 +141,7 @@ async def get_user_submissions(
         "userId": user_id,
         "assessmentType": "pre"
     }).to_list(None)
-    return submissions
+    return list_response(Assessment, submissions)
 
 @router.get("/submission/{submission_id}", response_model=Assessment)
 async def get_submission(
@@ -93,8 +155,8 @@ async def get_submission(
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
     
-    # Only allow doctors or the submission owner to view
-    if current_user["role"] != "doctor" and submission["userId"] != str(current_user["_id"]):
+    # Only allow the patient's doctors or the submission owner to view
+    if not await can_view_patient(current_user, submission["userId"]):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view this submission"
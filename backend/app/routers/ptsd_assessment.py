@@ -9,6 +9,10 @@ from app.models.assessment import (
 )
 from app.db.mongodb import get_database
 from app.core.auth import get_current_user
+from app.core.etag import bump_user_versions
+from app.services.care_assignments import can_view_patient, get_patient_ids
+from app.services.triage import record_assessment
+from app.services.instruments import question_texts, stored_questions, hydrate
 from bson import ObjectId
 from datetime import datetime
 
@@ -31,35 +35,7 @@ class AssessmentQuestion(BaseModel):
     questionText: str
     score: int
 
-PTSD_QUESTIONS = [
-    # Criterion B: Re-experiencing
-    "Having repeated, disturbing memories of the stressful experience",
-    "Having repeated, disturbing dreams of the stressful experience",
-    "Suddenly feeling or acting as if the stressful experience were happening again",
-    "Feeling very upset when something reminded you of the stressful experience",
-    "Having strong physical reactions when something reminded you of the stressful experience",
-    
-    # Criterion C: Avoidance
-    "Avoiding memories, thoughts, or feelings related to the stressful experience",
-    "Avoiding external reminders of the stressful experience",
-    
-    # Criterion D: Negative alterations in cognition and mood
-    "Trouble remembering important parts of the stressful experience",
-    "Having strong negative beliefs about yourself, other people, or the world",
-    "Blaming yourself or someone else for the stressful experience",
-    "Having strong negative feelings such as fear, horror, anger, guilt, or shame",
-    "Loss of interest in activities you used to enjoy",
-    "Feeling distant or cut off from other people",
-    "Having trouble experiencing positive feelings",
-    
-    # Criterion E: Alterations in arousal and reactivity
-    "Feeling irritable or having angry outbursts",
-    "Taking too many risks or doing things that could cause you harm",
-    "Being overly alert or watchful for danger",
-    "Being jumpy or easily startled",
-    "Having difficulty concentrating",
-    "Having trouble falling or staying asleep"
-]
+PTSD_QUESTIONS = question_texts("ptsd")
 
 router = APIRouter()
 
@@ -95,7 +71,7 @@ async def submit_ptsd_assessment(
         "userId": str(current_user["_id"]),
         "assessmentType": "ptsd",
         "status": "completed",
-        "questions": questions,
+        **stored_questions("ptsd", questions),
         "score": form_data.totalScore,
         "severity": form_data.severity,
         "criteriaB": form_data.criteriaB,
@@ -107,9 +83,11 @@ async def submit_ptsd_assessment(
     }
     
     result = await db.assessments.insert_one(assessment_dict)
+    await bump_user_versions(assessment_dict["userId"])
+    await record_assessment(assessment_dict)
     
     if (created_assessment := await db.assessments.find_one({"_id": result.inserted_id})) is not None:
-        return serialize_doc(created_assessment)
+        return serialize_doc(hydrate(created_assessment))
     
     raise HTTPException(status_code=500, detail="Failed to create assessment")
 
@@ -119,7 +97,7 @@ async def get_user_assessments(
     current_user: dict = Depends(get_current_user)
 ):
     """Get all PTSD assessments for a user"""
-    if current_user["role"] != "doctor" and str(current_user["_id"]) != user_id:
+    if not await can_view_patient(current_user, user_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view these assessments"
@@ -130,7 +108,7 @@ async def get_user_assessments(
         "userId": user_id,
         "assessmentType": "ptsd"
     }).to_list(None)
-    return [serialize_doc(assessment) for assessment in assessments]
+    return [serialize_doc(hydrate(assessment)) for assessment in assessments]
 
 @router.get("/submission/{assessment_id}")
 async def get_assessment(
@@ -144,18 +122,18 @@ async def get_assessment(
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    # Only allow doctors or the assessment owner to view
-    if current_user["role"] != "doctor" and assessment["userId"] != str(current_user["_id"]):
+    # Only allow the patient's doctors or the assessment owner to view
+    if not await can_view_patient(current_user, assessment["userId"]):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view this assessment"
         )
     
-    return serialize_doc(assessment)
+    return serialize_doc(hydrate(assessment))
 
 @router.get("/all-results", response_model=List[Dict[str, Any]])
 async def get_all_assessments(current_user: dict = Depends(get_current_user)):
-    """Get all PTSD assessments (doctor only)"""
+    """Get all PTSD assessments for the doctor's patients (doctor only)"""
     if current_user["role"] != "doctor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -163,8 +141,10 @@ async def get_all_assessments(current_user: dict = Depends(get_current_user)):
         )
     
     db = get_database()
+    panel = await get_patient_ids(str(current_user["_id"]))
     assessments = await db.assessments.find({
+        "userId": {"$in": panel},
         "assessmentType": "ptsd",
         "status": "completed"
     }).to_list(None)
-    return [serialize_doc(assessment) for assessment in assessments] 
\ No newline at end of file
+    return [serialize_doc(hydrate(assessment)) for assessment in assessments] 
\ No newline at end of file
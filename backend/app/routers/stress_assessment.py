@@ -9,6 +9,10 @@ from app.models.assessment import (
 )
 from app.db.mongodb import get_database
 from app.core.auth import get_current_user
+from app.core.etag import bump_user_versions
+from app.services.care_assignments import can_view_patient, get_patient_ids
+from app.services.triage import record_assessment
+from app.services.instruments import stored_questions, hydrate
 from bson import ObjectId
 from datetime import datetime
 
@@ -59,7 +63,7 @@ async def submit_stress_assessment(
         "userId": assessment_data.userId,
         "assessmentType": assessment_data.assessmentType,
         "status": "completed",
-        "questions": [q.dict() for q in assessment_data.questions],
+        **stored_questions(assessment_data.assessmentType, [q.dict() for q in assessment_data.questions]),
         "score": assessment_data.totalScore,
         "severity": determine_severity(assessment_data.totalScore),
         "startedAt": datetime.utcnow(),
@@ -67,9 +71,11 @@ async def submit_stress_assessment(
     }
     
     result = await db.assessments.insert_one(assessment_dict)
+    await bump_user_versions(assessment_dict["userId"])
+    await record_assessment(assessment_dict)
     
     if (created_assessment := await db.assessments.find_one({"_id": result.inserted_id})) is not None:
-        return serialize_doc(created_assessment)
+        return serialize_doc(hydrate(created_assessment))
     
     raise HTTPException(status_code=500, detail="Failed to create assessment")
 
@@ -79,8 +85,8 @@ async def get_user_assessments(
     current_user: dict = Depends(get_current_user)
 ):
     """Get all stress assessments for a user"""
-    # Allow doctors to view any patient's assessments or users to view their own
-    if current_user["role"] != "doctor" and str(current_user["_id"]) != user_id:
+    # Allow doctors to view their patients' assessments or users to view their own
+    if not await can_view_patient(current_user, user_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view these assessments"
@@ -91,7 +97,7 @@ async def get_user_assessments(
         "userId": user_id,
         "assessmentType": "stress"
     }).to_list(None)
-    return [serialize_doc(assessment) for assessment in assessments]
+    return [serialize_doc(hydrate(assessment)) for assessment in assessments]
 
 @router.get("/submission/{assessment_id}")
 async def get_assessment(
@@ -105,14 +111,14 @@ async def get_assessment(
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    # Only allow doctors or the assessment owner to view
-    if current_user["role"] != "doctor" and assessment["userId"] != str(current_user["_id"]):
+    # Only allow the patient's doctors or the assessment owner to view
+    if not await can_view_patient(current_user, assessment["userId"]):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view this assessment"
         )
     
-    return serialize_doc(assessment)
+    return serialize_doc(hydrate(assessment))
 
 def calculate_stress_score(responses: dict) -> float:
     """Calculate stress score based on responses, following PHQ-9 format (0-3 scale per question)"""
@@ -170,7 +176,7 @@ def determine_severity(score: float) -> str:
 
 @router.get("/all-results", response_model=List[Dict[str, Any]])
 async def get_all_assessments(current_user: dict = Depends(get_current_user)):
-    """Get all stress assessments (doctor only)"""
+    """Get all stress assessments for the doctor's patients (doctor only)"""
     if current_user["role"] != "doctor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -178,8 +184,10 @@ async def get_all_assessments(current_user: dict = Depends(get_current_user)):
         )
     
     db = get_database()
+    panel = await get_patient_ids(str(current_user["_id"]))
     assessments = await db.assessments.find({
+        "userId": {"$in": panel},
         "assessmentType": "stress",
         "status": "completed"
     }).to_list(None)
-    return [serialize_doc(assessment) for assessment in assessments] 
\ No newline at end of file
+    return [serialize_doc(hydrate(assessment)) for assessment in assessments] 
\ No newline at end of file
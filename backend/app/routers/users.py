@@ -1,11 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from typing import List
-from app.models.user import User, UserCreate, UserUpdate, Token, UserLogin
+from typing import List, Optional
+from app.models.user import User, UserCreate, UserUpdate, Token, UserLogin, RefreshRequest
 from app.db.mongodb import get_database
-from app.core.security import get_password_hash, verify_password, create_access_token
-from app.core.auth import get_current_user
+from app.core.security import get_password_hash, verify_password, password_needs_rehash, create_access_token, verify_token
+from app.core.auth import get_current_user, oauth2_scheme, optional_oauth2_scheme, revoke_token, invalidate_user
+from app.core import metrics
+from app.core.config import settings
+from app.core.tenancy import set_current_tenant
+from app.core.etag import current_user_conditional_get, bump_user_versions
+from app.core.rate_limit import rate_limit_by_ip, concurrency_limit
+from app.core.serialization import list_response
+from app.services.care_assignments import can_view_patient, get_patient_ids
+from app.services.sessions import create_session, rotate_session, revoke_family, revoke_user_sessions
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timedelta
 
 router = APIRouter()
@@ -22,8 +32,26 @@ def transform_user(user_doc):
         return user_dict
     return None
 
-@router.post("/login", response_model=Token)
-async def login(user_data: UserLogin):
+async def rehash_password(user_id, password: str, old_hash: str):
+    # Runs after the response; bcrypt stays off the event loop
+    new_hash = await run_in_threadpool(get_password_hash, password)
+    db = get_database()
+    # Skip if the password changed in the meantime
+    result = await db.users.update_one(
+        {"_id": user_id, "password": old_hash},
+        {"$set": {"password": new_hash}}
+    )
+    if result.modified_count:
+        metrics.increment("auth.password_rehashes")
+
+@router.post(
+    "/login",
+    response_model=Token,
+    dependencies=[Depends(rate_limit_by_ip("login")), Depends(concurrency_limit("login"))]
+)
+async def login(user_data: UserLogin, background_tasks: BackgroundTasks):
+    # Without a clinic, the email is looked up in the shared database
+    set_current_tenant(user_data.clinicId)
     db = get_database()
     user = await db.users.find_one({"email": user_data.email})
     if not user:
@@ -33,46 +61,109 @@ async def login(user_data: UserLogin):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not verify_password(user_data.password, user["password"]):
+    if not await run_in_threadpool(verify_password, user_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create access token
+    # Bring the hash to the configured BCRYPT_ROUNDS
+    if password_needs_rehash(user["password"]):
+        background_tasks.add_task(rehash_password, user["_id"], user_data.password, user["password"])
+    
+    # Create access token, tied to a new refresh token family
+    refresh_token, family_id = await create_session(str(user["_id"]))
+    return issue_tokens(user, refresh_token, family_id)
+
+def issue_tokens(user: dict, refresh_token: str, family_id: str) -> dict:
     access_token = create_access_token(
-        data={"sub": str(user["_id"]), "email": user["email"]}
+        data={
+            "sub": str(user["_id"]),
+            "email": user["email"],
+            "clinicId": user.get("clinicId", settings.DEFAULT_CLINIC_ID),
+            "sid": family_id
+        }
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request_data: RefreshRequest):
+    """Trade a refresh token for new tokens without re-checking the password"""
+    set_current_tenant(request_data.clinicId)
+    
+    rotated = await rotate_session(request_data.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    session, refresh_token = rotated
+    
+    db = get_database()
+    user = await db.users.find_one({"_id": ObjectId(session["userId"])})
+    if user is None:
+        await revoke_family(session["familyId"])
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return issue_tokens(user, refresh_token, session["familyId"])
 
-@router.get("/me", response_model=User)
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme), current_user = Depends(get_current_user)):
+    payload = verify_token(token)
+    if payload is not None and payload.get("jti"):
+        await revoke_token(payload)
+    if payload is not None and payload.get("sid"):
+        await revoke_family(payload["sid"])
+    return {"message": "Logged out successfully"}
+
+@router.get("/me", response_model=User, dependencies=[Depends(current_user_conditional_get)])
 async def read_users_me(current_user = Depends(get_current_user)):
     return transform_user(current_user)
 
 @router.get("/", response_model=List[User])
 async def get_users(current_user: dict = Depends(get_current_user)):
-    # Only allow doctors to see all users
+    # Doctors see the patients on their panel
     if current_user["role"] != "doctor":
         raise HTTPException(status_code=403, detail="Not authorized to view all users")
     
     db = get_database()
-    users = await db.users.find().to_list(length=None)
+    patient_ids = await get_patient_ids(str(current_user["_id"]))
+    users = await db.users.find(
+        {"_id": {"$in": [ObjectId(patient_id) for patient_id in patient_ids if ObjectId.is_valid(patient_id)]}}
+    ).to_list(length=None)
     transformed_users = [transform_user(user) for user in users]
-    return transformed_users
+    return list_response(User, transformed_users)
 
 @router.get("/{user_id}", response_model=User)
 async def get_user(user_id: str, current_user: dict = Depends(get_current_user)):
     db = get_database()
     if (user := await db.users.find_one({"_id": ObjectId(user_id)})) is not None:
-        # Only allow users to see their own data or doctors to see any user
-        if str(user["_id"]) == str(current_user["_id"]) or current_user["role"] == "doctor":
+        # Only allow users to see their own data or doctors that of their patients
+        if await can_view_patient(current_user, user_id):
             return transform_user(user)
         raise HTTPException(status_code=403, detail="Not authorized to view this user")
     raise HTTPException(status_code=404, detail="User not found")
 
 @router.post("/", response_model=User)
-async def create_user(user: UserCreate):
+async def create_user(user: UserCreate, token: Optional[str] = Depends(optional_oauth2_scheme)):
+    # Admins add accounts to their own clinic; anyone else signs up to the default one
+    creator = await get_current_user(token) if token is not None else None
+    if creator is not None and creator.get("isAdmin") is True:
+        clinic_id = creator.get("clinicId", settings.DEFAULT_CLINIC_ID)
+    else:
+        clinic_id = settings.DEFAULT_CLINIC_ID
+        # Once clinics share the deployment, a doctor joins one through its admin
+        if settings.MULTI_TENANT and user.role == "doctor":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Doctor accounts are created by a clinic admin"
+            )
+    set_current_tenant(clinic_id)
     db = get_database()
     
     # Check if email already exists
@@ -80,12 +171,16 @@ async def create_user(user: UserCreate):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user_dict = user.model_dump()
+    user_dict["clinicId"] = clinic_id
     # Hash the password
-    user_dict["password"] = get_password_hash(user_dict["password"])
+    user_dict["password"] = await run_in_threadpool(get_password_hash, user_dict["password"])
     user_dict["createdAt"] = datetime.utcnow()
     user_dict["updatedAt"] = datetime.utcnow()
     
-    result = await db.users.insert_one(user_dict)
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     if (created_user := await db.users.find_one({"_id": result.inserted_id})) is not None:
         return transform_user(created_user)
@@ -97,26 +192,43 @@ async def update_user(
     user: UserUpdate, 
     current_user: dict = Depends(get_current_user)
 ):
-    # Only allow users to update their own data or doctors to update any user
-    if str(current_user["_id"]) != user_id and current_user["role"] != "doctor":
+    # Only allow users to update their own data or doctors that of their patients
+    if not await can_view_patient(current_user, user_id):
         raise HTTPException(status_code=403, detail="Not authorized to update this user")
     
     db = get_database()
     user_dict = user.model_dump(exclude_unset=True)
     
+    # A password is only ever changed by its owner
+    if "password" in user_dict and str(current_user["_id"]) != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized to change this user's password")
+    
     # If password is being updated, hash it
     if "password" in user_dict:
-        user_dict["password"] = get_password_hash(user_dict["password"])
+        user_dict["password"] = await run_in_threadpool(get_password_hash, user_dict["password"])
     
     user_dict["updatedAt"] = datetime.utcnow()
     
     if (await db.users.find_one({"_id": ObjectId(user_id)})) is None:
         raise HTTPException(status_code=404, detail="User not found")
+    
+    # Check if the new email belongs to another account
+    if "email" in user_dict and await db.users.find_one({"email": user_dict["email"], "_id": {"$ne": ObjectId(user_id)}}):
+        raise HTTPException(status_code=400, detail="Email already registered")
         
-    await db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": user_dict}
-    )
+    try:
+        await db.users.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": user_dict}
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await bump_user_versions(user_id)
+    # Other workers drop it when the change stream delivers the update
+    await invalidate_user(user_id)
+    # A new password ends every other login
+    if "password" in user_dict:
+        await revoke_user_sessions(user_id)
     
     if (updated_user := await db.users.find_one({"_id": ObjectId(user_id)})) is not None:
         return transform_user(updated_user)
@@ -124,8 +236,8 @@ async def update_user(
 
 @router.delete("/{user_id}")
 async def delete_user(user_id: str, current_user: dict = Depends(get_current_user)):
-    # Only allow users to delete their own account or doctors to delete any user
-    if str(current_user["_id"]) != user_id and current_user["role"] != "doctor":
+    # Only allow users to delete their own account or doctors those of their patients
+    if not await can_view_patient(current_user, user_id):
         raise HTTPException(status_code=403, detail="Not authorized to delete this user")
     
     db = get_database()
@@ -133,4 +245,8 @@ async def delete_user(user_id: str, current_user: dict = Depends(get_current_use
         raise HTTPException(status_code=404, detail="User not found")
     
     await db.users.delete_one({"_id": ObjectId(user_id)})
+    await db.triage.delete_one({"_id": user_id})
+    await invalidate_user(user_id)
+    await revoke_user_sessions(user_id)
+    await bump_user_versions(user_id)
     return {"message": "User deleted successfully"}
\ No newline at end of file
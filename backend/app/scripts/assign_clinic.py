@@ -0,0 +1,35 @@
+from app.db.mongodb import get_database, connect_to_mongo, close_mongo_connection
+import asyncio
+import sys
+
+TENANT_COLLECTIONS = ["users", "assessments", "notifications"]
+
+async def assign_clinic(clinic_id: str):
+    # Connect to MongoDB
+    await connect_to_mongo()
+    
+    try:
+        db = get_database()
+        
+        # Stamp existing documents so they stay visible once MULTI_TENANT is on
+        for name in TENANT_COLLECTIONS:
+            result = await db[name].update_many(
+                {"clinicId": {"$exists": False}},
+                {"$set": {"clinicId": clinic_id}}
+            )
+            print(f"Assigned {result.modified_count} {name} documents to clinic {clinic_id}")
+        
+        # Assessments and notifications inherit their owner's clinic when it differs
+        users = db.users.find({"clinicId": {"$ne": clinic_id}}, projection={"clinicId": 1})
+        async for user in users:
+            for name in ["assessments", "notifications"]:
+                await db[name].update_many(
+                    {"userId": str(user["_id"])},
+                    {"$set": {"clinicId": user["clinicId"]}}
+                )
+    finally:
+        # Close MongoDB connection
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(assign_clinic(sys.argv[1] if len(sys.argv) > 1 else "default"))
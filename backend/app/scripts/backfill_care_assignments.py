@@ -0,0 +1,59 @@
+from app.db.mongodb import get_database, connect_to_mongo, close_mongo_connection
+from app.core.config import settings
+from app.core.tenancy import tenant_context, tenant_scopes
+from bson import ObjectId
+from collections import defaultdict
+from pymongo import UpdateOne
+from datetime import datetime
+import asyncio
+
+async def backfill_scope():
+    db = get_database()
+
+    # Before care assignments, every doctor saw every patient with a
+    # completed assessment; assign those patients to keep that visibility,
+    # within each clinic only
+    patient_ids = await db.assessments.distinct("userId", {"status": "completed"})
+    patients = await db.users.find(
+        {"_id": {"$in": [ObjectId(patient_id) for patient_id in patient_ids if ObjectId.is_valid(patient_id)]}, "role": "patient"},
+        projection={"clinicId": 1}
+    ).to_list(None)
+    doctors = await db.users.find({"role": "doctor"}, projection={"clinicId": 1}).to_list(None)
+
+    doctors_by_clinic = defaultdict(list)
+    for doctor in doctors:
+        doctors_by_clinic[doctor.get("clinicId", settings.DEFAULT_CLINIC_ID)].append(str(doctor["_id"]))
+
+    operations = []
+    for patient in patients:
+        clinic_id = patient.get("clinicId", settings.DEFAULT_CLINIC_ID)
+        operations += [
+            UpdateOne(
+                {"doctorId": doctor_id, "patientId": str(patient["_id"])},
+                {"$setOnInsert": {"clinicId": clinic_id, "createdAt": datetime.utcnow()}},
+                upsert=True
+            )
+            for doctor_id in doctors_by_clinic[clinic_id]
+        ]
+
+    print(f"Assigning {len(patients)} patients to the doctors of their clinic ({len(operations)} pairs)")
+    if operations:
+        result = await db.care_assignments.bulk_write(operations, ordered=False)
+        print(f"Created {result.upserted_count} assignments")
+
+async def backfill_care_assignments():
+    # Connect to MongoDB
+    await connect_to_mongo()
+
+    try:
+        # Clinics routed to their own database are visited separately
+        for scope in tenant_scopes():
+            with tenant_context(scope):
+                print(f"{scope or 'shared'}:")
+                await backfill_scope()
+    finally:
+        # Close MongoDB connection
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(backfill_care_assignments())
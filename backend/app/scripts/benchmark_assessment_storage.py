@@ -0,0 +1,43 @@
+from app.services.instruments import INSTRUMENTS, question_texts, compact_questions, hydrate
+from bson import ObjectId, encode, decode
+from datetime import datetime
+import time
+
+ITERATIONS = 10000
+
+def legacy_document(assessment_type: str):
+    return {
+        "_id": ObjectId(),
+        "userId": str(ObjectId()),
+        "assessmentType": assessment_type,
+        "status": "completed",
+        "questions": [
+            {"questionId": i + 1, "questionText": text, "score": i % 4}
+            for i, text in enumerate(question_texts(assessment_type))
+        ],
+        "score": 12,
+        "severity": "Moderate",
+        "startedAt": datetime.utcnow(),
+        "completedAt": datetime.utcnow()
+    }
+
+def benchmark_assessment_storage():
+    # BSON size per document before and after compaction; no database needed
+    print(f"{'instrument':<10} {'legacy':>8} {'compact':>8} {'saved':>7}   hydrate per read")
+    for assessment_type in INSTRUMENTS:
+        legacy = legacy_document(assessment_type)
+        compact = {key: value for key, value in legacy.items() if key != "questions"}
+        compact.update(compact_questions(assessment_type, legacy["questions"]))
+        legacy_size, compact_size = len(encode(legacy)), len(encode(compact))
+        
+        # Cost of re-hydrating the questions on read, decode included
+        raw = encode(compact)
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            hydrate(decode(raw))
+        hydrate_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+        
+        print(f"{assessment_type:<10} {legacy_size:>7}B {compact_size:>7}B {1 - compact_size / legacy_size:>6.0%}   {hydrate_us:.1f} µs")
+
+if __name__ == "__main__":
+    benchmark_assessment_storage()
@@ -0,0 +1,20 @@
+from app.core.config import settings
+from app.services import audit
+import time
+
+ITERATIONS = 100000
+
+def benchmark_audit_record():
+    # Measure the per-request cost of queueing an audit event; no database needed
+    settings.AUDIT_BUFFER_SIZE = ITERATIONS
+    
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        audit.record("doctor", str(i), "GET /patients/{patient_id}")
+    elapsed = time.perf_counter() - start
+    
+    print(f"Queued {ITERATIONS} audit events in {elapsed:.3f}s")
+    print(f"Mean overhead per request: {elapsed / ITERATIONS * 1e6:.2f} µs")
+
+if __name__ == "__main__":
+    benchmark_audit_record()
@@ -0,0 +1,60 @@
+from app.core.serialization import list_response
+from app.models.assessment import Assessment
+from bson import ObjectId
+from datetime import datetime
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from typing import List
+import asyncio
+import json
+import time
+
+ITEMS = 10000
+ROUNDS = 5
+
+def sample_documents():
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "userId": str(ObjectId()),
+            "assessmentType": "anxiety",
+            "status": "completed",
+            "responses": {f"q{n}": n % 4 for n in range(7)},
+            "score": float(i % 21),
+            "normalizedScore": None,
+            "severity": "Mild anxiety",
+            "startedAt": now,
+            "completedAt": now
+        }
+        for i in range(ITEMS)
+    ]
+
+def cpu_ms(fn) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+def benchmark_serialization():
+    # CPU per 10k assessments; no database needed
+    documents = sample_documents()
+    field = create_response_field(name="response", type_=List[Assessment])
+    
+    def fastapi_default():
+        content = asyncio.run(serialize_response(field=field, response_content=documents))
+        json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+    
+    def fast_path():
+        list_response(Assessment, documents)
+    
+    for label, fn in [
+        ("response_model", fastapi_default),
+        ("list_response", fast_path)
+    ]:
+        print(f"{label:<16} {cpu_ms(fn):8.1f} ms CPU per {ITEMS} items")
+
+if __name__ == "__main__":
+    benchmark_serialization()
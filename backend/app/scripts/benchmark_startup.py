@@ -0,0 +1,63 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+def import_profile(top: int):
+    # Cumulative import time per module, as reported by python -X importtime
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative), name.strip()))
+    
+    total = next(us for us, name in modules if name == "app.main")
+    print(f"import app.main: {total / 1000:.0f} ms")
+    # Cumulative, so a module's time also appears in everything that imports it
+    for us, name in sorted((m for m in modules if not m[1].startswith(("encodings", "_"))), reverse=True)[1:top + 1]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+def time_to_first_request(port: int) -> float:
+    # One worker from process start to its first served response
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError("Worker exited during startup")
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+def benchmark_startup(runs: int, port: int, top: int):
+    import_profile(top)
+    
+    timings = [time_to_first_request(port) for _ in range(runs)]
+    print(f"\nTime to first served request over {runs} worker starts:")
+    print(f"  min {min(timings) * 1000:.0f} ms   median {statistics.median(timings) * 1000:.0f} ms   max {max(timings) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API worker cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    benchmark_startup(args.runs, args.port, args.top)
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+def wait_until_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+async def _load(url: str, connections: int, seconds: float) -> int:
+    done = 0
+    deadline = time.monotonic() + seconds
+    
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal done
+        while time.monotonic() < deadline:
+            await client.get(url)
+            done += 1
+    
+    limits = httpx.Limits(max_connections=connections)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(connections)))
+    return done
+
+def _load_process(args) -> int:
+    return asyncio.run(_load(*args))
+
+def run_load(url: str, processes: int, connections: int, seconds: float) -> float:
+    # Several client processes, so the load generator is not the bottleneck
+    with multiprocessing.Pool(processes) as pool:
+        counts = pool.map(_load_process, [(url, connections, seconds)] * processes)
+    return sum(counts) / seconds
+
+def benchmark_workers(worker_counts, path: str, seconds: float, port: int):
+    results = {}
+    for workers in worker_counts:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "app.serve", "--workers", str(workers), "--port", str(port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_ready(f"http://127.0.0.1:{port}/")
+            url = f"http://127.0.0.1:{port}{path}"
+            run_load(url, workers, 8, 1)  # warm-up
+            results[workers] = run_load(url, max(2, workers), 32, seconds)
+        finally:
+            server.terminate()
+            server.wait()
+        
+        baseline = results[worker_counts[0]] / worker_counts[0]
+        efficiency = results[workers] / (baseline * workers)
+        print(f"workers={workers:<3} {results[workers]:10.0f} req/s   scaling efficiency {efficiency:6.1%}")
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Measure throughput of app.serve as workers are added")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, max(1, cores // 2), cores}))
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+    benchmark_workers(args.workers, args.path, args.seconds, args.port)
@@ -0,0 +1,8 @@
+from app.core import cache
+from app.core.config import settings
+import asyncio
+
+if __name__ == "__main__":
+    # Started by app.serve when CACHE_BACKEND=socket
+    print(f"Cache daemon listening on {settings.CACHE_SOCKET_PATH}")
+    asyncio.run(cache.serve(settings.CACHE_SOCKET_PATH, settings.CACHE_MAX_ENTRIES))
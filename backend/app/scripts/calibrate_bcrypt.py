@@ -0,0 +1,40 @@
+import argparse
+import statistics
+import time
+from passlib.hash import bcrypt
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+def time_rounds(rounds: int, samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.using(rounds=rounds).hash("calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def calibrate(target_ms: float, samples: int):
+    # Each extra round doubles the cost; take the highest that stays within target
+    chosen = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = time_rounds(rounds, samples)
+        print(f"rounds={rounds:<3} {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    
+    print(f"\nTarget {target_ms:.0f} ms per hash on this host:")
+    if chosen == MIN_ROUNDS and elapsed > target_ms:
+        print(f"(even the minimum of {MIN_ROUNDS} rounds is slower than the target)")
+    print(f"BCRYPT_ROUNDS={chosen}")
+    print("Existing hashes are upgraded on each user's next login.")
+
+if __name__ == "__main__":
+    from app.core.config import settings
+    
+    parser = argparse.ArgumentParser(description="Pick bcrypt rounds that hit a target hash latency on this host")
+    parser.add_argument("--target-ms", type=float, default=settings.BCRYPT_TARGET_MS)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+    calibrate(args.target_ms, args.samples)
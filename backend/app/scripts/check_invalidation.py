@@ -0,0 +1,45 @@
+from app.db.mongodb import get_database, connect_to_mongo, close_mongo_connection
+from app.core import invalidation
+import asyncio
+import sys
+
+CHECK_COLLECTION = "invalidation_check"
+
+async def check_invalidation() -> bool:
+    # Needs a replica set; a local single node works:
+    #   mongod --replSet rs0 --dbpath /tmp/rs0 && mongosh --eval "rs.initiate()"
+    await connect_to_mongo()
+    
+    events: asyncio.Queue = asyncio.Queue()
+    invalidation.subscribe(CHECK_COLLECTION, events.put_nowait)
+    invalidation.start_bus()
+    try:
+        for _ in range(100):
+            if invalidation.streaming():
+                break
+            await asyncio.sleep(0.1)
+        else:
+            print("Change stream did not open; is MONGODB_URL a replica set?")
+            return False
+        
+        db = get_database()
+        result = await db[CHECK_COLLECTION].insert_one({"value": 1})
+        await db[CHECK_COLLECTION].update_one({"_id": result.inserted_id}, {"$set": {"value": 2}})
+        await db[CHECK_COLLECTION].delete_one({"_id": result.inserted_id})
+        
+        for expected in ("insert", "update", "delete"):
+            event = await asyncio.wait_for(events.get(), timeout=5)
+            if (event.operation, event.document_id) != (expected, str(result.inserted_id)):
+                print(f"Expected {expected} of {result.inserted_id}, got {event}")
+                return False
+            print(f"Received {event.operation} of {event.document_id}")
+        print("Invalidation bus delivers changes")
+        return True
+    finally:
+        await invalidation.stop_bus()
+        await get_database()[CHECK_COLLECTION].drop()
+        # Close MongoDB connection
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(check_invalidation()) else 1)
@@ -0,0 +1,120 @@
+from app.db.mongodb import get_database, connect_to_mongo, close_mongo_connection
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.core.tenancy import tenant_context
+from datetime import datetime
+import asyncio
+import httpx
+import sys
+
+CLINIC_A = "isolation-check-a"
+CLINIC_B = "isolation-check-b"
+PASSWORD = "isolation-check-password"
+
+def _user(email: str, role: str, clinic_id: str) -> dict:
+    return {
+        "firstName": "Isolation",
+        "lastName": "Check",
+        "email": email,
+        "role": role,
+        "gender": "other",
+        "dateOfBirth": datetime(1990, 1, 1),
+        "clinicId": clinic_id,
+        "password": get_password_hash(PASSWORD),
+        "createdAt": datetime.utcnow(),
+        "updatedAt": datetime.utcnow()
+    }
+
+async def _cleanup():
+    with tenant_context(None):
+        db = get_database()
+        clinics = {"$in": [CLINIC_A, CLINIC_B]}
+        await db.users.delete_many({"$or": [{"clinicId": clinics}, {"email": {"$regex": r"^isolation-check-"}}]})
+        await db.assessments.delete_many({"clinicId": clinics})
+        await db.care_assignments.delete_many({"clinicId": clinics})
+
+async def check_tenant_isolation() -> bool:
+    # Runs the API in process against MONGODB_URL, with clinics sharing it
+    settings.MULTI_TENANT = True
+    from app.main import app
+    await connect_to_mongo()
+
+    try:
+        await _cleanup()
+        with tenant_context(None):
+            db = get_database()
+            doctor = await db.users.insert_one(_user("isolation-check-doctor@example.com", "doctor", CLINIC_A))
+            patient = await db.users.insert_one(_user("isolation-check-patient@example.com", "patient", CLINIC_B))
+            patient_id = str(patient.inserted_id)
+            assessment = await db.assessments.insert_one({
+                "userId": patient_id,
+                "clinicId": CLINIC_B,
+                "assessmentType": "anxiety",
+                "status": "completed",
+                "severity": "Severe",
+                "startedAt": datetime.utcnow(),
+                "completedAt": datetime.utcnow()
+            })
+            # Stamped with the doctor's clinic, as an old cross-clinic backfill would have
+            await db.care_assignments.insert_one({
+                "doctorId": str(doctor.inserted_id),
+                "patientId": patient_id,
+                "clinicId": CLINIC_A,
+                "createdAt": datetime.utcnow()
+            })
+
+        failures = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            signup = {
+                "firstName": "Isolation",
+                "lastName": "Check",
+                "email": "isolation-check-signup@example.com",
+                "password": PASSWORD,
+                "gender": "other",
+                "dateOfBirth": "1990-01-01T00:00:00",
+                "clinicId": CLINIC_B
+            }
+            response = await client.post("/api/users/", json={**signup, "role": "doctor"})
+            if response.status_code != 403:
+                failures.append(f"doctor sign up answered {response.status_code}, expected 403")
+            response = await client.post("/api/users/", json={**signup, "role": "patient"})
+            if response.status_code != 200 or response.json().get("clinicId") != settings.DEFAULT_CLINIC_ID:
+                failures.append(f"patient sign up chose its clinic: {response.status_code} {response.text}")
+
+            response = await client.post("/api/users/login", json={
+                "email": "isolation-check-doctor@example.com",
+                "password": PASSWORD,
+                "clinicId": CLINIC_A
+            })
+            if response.status_code != 200:
+                print(f"Login failed: {response.status_code} {response.text}")
+                return False
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            reads = [
+                (f"/api/users/{patient_id}", lambda r: r.status_code == 404),
+                (f"/api/assessments/user/{patient_id}", lambda r: r.status_code == 200 and r.json() == []),
+                (f"/api/assessments/{assessment.inserted_id}", lambda r: r.status_code == 404),
+                (f"/api/doctor/patients/{patient_id}", lambda r: r.status_code in (403, 404)),
+                ("/api/doctor/patients", lambda r: r.status_code == 200 and r.json() == []),
+                ("/api/users/", lambda r: all(u["clinicId"] == CLINIC_A for u in r.json()))
+            ]
+            for path, isolated in reads:
+                response = await client.get(path, headers=headers)
+                print(f"GET {path}: {response.status_code}")
+                if not isolated(response):
+                    failures.append(f"clinic A read clinic B through {path}: {response.status_code} {response.text}")
+
+        for failure in failures:
+            print(failure)
+        if not failures:
+            print("Clinic A cannot read clinic B's data")
+        return not failures
+    finally:
+        await _cleanup()
+        # Close MongoDB connection
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(check_tenant_isolation()) else 1)
@@ -0,0 +1,50 @@
+from app.db.mongodb import get_database, connect_to_mongo, close_mongo_connection
+from app.core.tenancy import tenant_context, tenant_scopes
+from app.services.instruments import INSTRUMENTS, compact_questions
+from pymongo import UpdateOne
+import asyncio
+
+BATCH_SIZE = 1000
+
+async def compact_assessments():
+    # Connect to MongoDB
+    await connect_to_mongo()
+    
+    try:
+        for clinic_id in tenant_scopes():
+            with tenant_context(clinic_id):
+                await _compact(get_database())
+    finally:
+        # Close MongoDB connection
+        await close_mongo_connection()
+
+async def _compact(db):
+    cursor = db.assessments.find(
+        {"assessmentType": {"$in": list(INSTRUMENTS)}, "questions": {"$exists": True}},
+        projection={"assessmentType": 1, "questions": 1},
+        batch_size=BATCH_SIZE
+    )
+    
+    operations = []
+    compacted = skipped = 0
+    async for assessment in cursor:
+        compact = compact_questions(assessment["assessmentType"], assessment["questions"])
+        if compact is None:
+            # Wording or order differs from the catalog; keep the full questions
+            skipped += 1
+            continue
+        # Only rewrite the document if its questions are still the ones read
+        operations.append(UpdateOne(
+            {"_id": assessment["_id"], "questions": assessment["questions"]},
+            {"$set": compact, "$unset": {"questions": ""}}
+        ))
+        if len(operations) >= BATCH_SIZE:
+            compacted += (await db.assessments.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+    
+    if operations:
+        compacted += (await db.assessments.bulk_write(operations, ordered=False)).modified_count
+    print(f"Compacted {compacted} assessments, left {skipped} that don't match the instrument catalog")
+
+if __name__ == "__main__":
+    asyncio.run(compact_assessments())
@@ -0,0 +1,24 @@
+from app.db.mongodb import connect_to_mongo, close_mongo_connection
+from app.services.parquet_export import export_all
+import asyncio
+
+async def export_parquet():
+    # Connect to MongoDB
+    await connect_to_mongo()
+    
+    try:
+        # Incremental: each run picks up where the previous one stopped
+        for scope, result in (await export_all()).items():
+            if result is None:
+                print(f"{scope}: skipped, another export is running")
+                continue
+            print(
+                f"{scope}: exported {result['rows']} assessments to {result['files']} files "
+                f"(completedAt {result['exportedFrom']} to {result['exportedUntil']})"
+            )
+    finally:
+        # Close MongoDB connection
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(export_parquet())
@@ -0,0 +1,33 @@
+from app.db.mongodb import get_database, connect_to_mongo, close_mongo_connection
+from app.core.tenancy import tenant_context
+import argparse
+import asyncio
+
+async def grant_admin(email: str, clinic_id: str = None, revoke: bool = False):
+    # Connect to MongoDB
+    await connect_to_mongo()
+
+    try:
+        # A clinic routed to its own deployment keeps its users there
+        with tenant_context(clinic_id):
+            db = get_database()
+            query = {"email": email}
+            if clinic_id is not None:
+                query["clinicId"] = clinic_id
+            result = await db.users.update_one(query, {"$set": {"isAdmin": not revoke}})
+
+        if result.matched_count == 0:
+            print(f"No user with email {email}")
+        else:
+            print(f"{'Revoked' if revoke else 'Granted'} admin access for {email}")
+    finally:
+        # Close MongoDB connection
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grant or revoke access to the /api/admin endpoints")
+    parser.add_argument("email")
+    parser.add_argument("--clinic", default=None, help="clinic of the user, when emails repeat across clinics")
+    parser.add_argument("--revoke", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(grant_admin(args.email, args.clinic, args.revoke))
@@ -0,0 +1,26 @@
+import argparse
+import httpx
+
+def profile(url: str, token: str, seconds: float, format: str, output: str):
+    # Profile whichever worker serves the request
+    response = httpx.post(
+        f"{url}/api/admin/profile",
+        params={"seconds": seconds, "format": format},
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=seconds + 30
+    )
+    response.raise_for_status()
+    
+    with open(output, "wb") as f:
+        f.write(response.content)
+    print(f"Wrote {format} profile to {output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capture a sampling profile from a running API worker")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Access token of an admin account")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--format", choices=["collapsed", "speedscope"], default="collapsed")
+    parser.add_argument("--output", default="profile.txt")
+    args = parser.parse_args()
+    profile(args.url, args.token, args.seconds, args.format, args.output)
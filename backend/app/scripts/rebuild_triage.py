@@ -0,0 +1,37 @@
+from app.db.mongodb import get_database, connect_to_mongo, close_mongo_connection
+from app.core.tenancy import tenant_context, tenant_scopes
+from app.services.triage import record_assessment
+import asyncio
+
+async def rebuild_scope() -> int:
+    db = get_database()
+    
+    await db.triage.delete_many({})
+    
+    # Replay completed assessments oldest first so the latest result per instrument wins
+    cursor = db.assessments.find(
+        {"status": "completed", "severity": {"$exists": True}}
+    ).sort("completedAt", 1)
+    
+    count = 0
+    async for assessment in cursor:
+        await record_assessment(assessment)
+        count += 1
+    return count
+
+async def rebuild_triage():
+    # Connect to MongoDB
+    await connect_to_mongo()
+    
+    try:
+        # Clinics routed to their own database are visited separately
+        for scope in tenant_scopes():
+            with tenant_context(scope):
+                count = await rebuild_scope()
+            print(f"{scope or 'shared'}: rebuilt triage queue from {count} assessments")
+    finally:
+        # Close MongoDB connection
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_triage())
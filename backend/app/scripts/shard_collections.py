@@ -0,0 +1,30 @@
+from app.db.mongodb import connect_to_mongo, close_mongo_connection, MongoDB
+from app.core.config import settings
+import asyncio
+
+# Tenant data is sharded by clinic first, so one clinic's load stays on its chunks
+SHARD_KEYS = {
+    "users": {"clinicId": 1, "_id": 1},
+    "assessments": {"clinicId": 1, "userId": 1},
+    "notifications": {"clinicId": 1, "userId": 1},
+}
+
+async def shard_collections():
+    # Connect to the mongos router of the sharded cluster
+    await connect_to_mongo()
+    
+    try:
+        admin = MongoDB.client.admin
+        await admin.command("enableSharding", settings.MONGODB_DB_NAME)
+        
+        for name, key in SHARD_KEYS.items():
+            namespace = f"{settings.MONGODB_DB_NAME}.{name}"
+            await MongoDB.db[name].create_index(list(key.items()))
+            await admin.command("shardCollection", namespace, key=key)
+            print(f"Sharded {namespace} on {key}")
+    finally:
+        # Close MongoDB connection
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(shard_collections())
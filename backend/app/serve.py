@@ -0,0 +1,51 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+import uvicorn
+from app.core.config import settings
+
+def start_cache_daemon() -> subprocess.Popen:
+    if os.path.exists(settings.CACHE_SOCKET_PATH):
+        os.unlink(settings.CACHE_SOCKET_PATH)
+    daemon = subprocess.Popen([sys.executable, "-m", "app.scripts.cache_daemon"])
+    # Workers connect during startup, so the socket has to exist first
+    deadline = time.monotonic() + 10
+    while not os.path.exists(settings.CACHE_SOCKET_PATH):
+        if daemon.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("Cache daemon failed to start")
+        time.sleep(0.05)
+    return daemon
+
+def serve(host: str, port: int, workers: int):
+    """Run the API with one uvicorn worker process per core.
+
+    Each worker runs the app's lifespan startup (connection pools, indexes,
+    question catalog) before it accepts connections.
+    """
+    # Workers inherit it, so RATE_LIMIT_STORE=auto knows they are several
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    daemon = start_cache_daemon() if settings.CACHE_BACKEND == "socket" else None
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            lifespan="on",
+            proxy_headers=True,
+            log_level="info"
+        )
+    finally:
+        if daemon is not None:
+            daemon.terminate()
+            daemon.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API with multiple worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY or os.cpu_count())
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
@@ -0,0 +1,167 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.core.tenancy import tenant_context, tenant_scopes
+from app.db.mongodb import get_database
+
+FUNNEL_STAGES = ["pre", "stress", "anxiety", "ptsd"]
+
+ROLLUP_STATE_ID = "daily_rollup"
+
+_rollup_task: Optional[asyncio.Task] = None
+
+def _day(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+def day_ranges(days: Iterable[datetime]) -> List[Dict[str, datetime]]:
+    """completedAt conditions covering whole days, merging consecutive ones."""
+    ranges: List[Dict[str, datetime]] = []
+    for day in sorted({_day(day) for day in days}):
+        if ranges and ranges[-1]["$lt"] == day:
+            ranges[-1]["$lt"] = day + timedelta(days=1)
+        else:
+            ranges.append({"$gte": day, "$lt": day + timedelta(days=1)})
+    return ranges
+
+async def rebuild_rollups(ranges: List[Dict[str, datetime]]) -> None:
+    """Recount the rollups for assessments completed within ``ranges``.
+
+    Daily counts go to analytics_daily, keyed by (day, type, severity), and
+    each patient's set of completed types goes to analytics_funnel. Ranges
+    must cover whole days: each daily count is replaced by a fresh count of
+    its day, and funnel types are merged as a set union, so recounting the
+    same days again changes nothing.
+    """
+    if not ranges:
+        return
+    db = get_database()
+    match = {"status": "completed", "$or": [{"completedAt": completed_at} for completed_at in ranges]}
+
+    await db.assessments.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "clinicId": "$clinicId",
+                "day": {"$dateTrunc": {"date": "$completedAt", "unit": "day"}},
+                "type": "$assessmentType",
+                "severity": {"$ifNull": ["$severity", "unknown"]}
+            },
+            "count": {"$sum": 1},
+            "scoreSum": {"$sum": {"$ifNull": ["$score", 0]}}
+        }},
+        {"$merge": {
+            "into": "analytics_daily",
+            "on": "_id",
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]).to_list(None)
+
+    await db.assessments.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": "$userId",
+            "clinicId": {"$first": "$clinicId"},
+            "types": {"$addToSet": "$assessmentType"}
+        }},
+        {"$merge": {
+            "into": "analytics_funnel",
+            "on": "_id",
+            "whenMatched": [{"$set": {"types": {"$setUnion": ["$types", "$$new.types"]}}}],
+            "whenNotMatched": "insert"
+        }}
+    ]).to_list(None)
+
+async def mark_days_stale(days: Iterable[datetime]) -> None:
+    """Have the next rollup run recount these days (e.g. after an import)."""
+    stale = sorted({_day(day) for day in days})
+    if not stale:
+        return
+    db = get_database()
+    await db.analytics_state.update_one(
+        {"_id": ROLLUP_STATE_ID},
+        {"$addToSet": {"staleDays": {"$each": stale}}},
+        upsert=True
+    )
+
+async def _acquire_lease(db, owner: str) -> Optional[Dict[str, Any]]:
+    now = datetime.utcnow()
+    try:
+        return await db.analytics_state.find_one_and_update(
+            {"_id": ROLLUP_STATE_ID, "$or": [{"leaseUntil": {"$exists": False}}, {"leaseUntil": {"$lt": now}}]},
+            {"$set": {"leaseOwner": owner, "leaseUntil": now + timedelta(seconds=settings.ANALYTICS_ROLLUP_LEASE_SECONDS)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # The state document exists and another run holds the lease
+        return None
+
+async def refresh_rollups() -> Optional[Dict[str, Any]]:
+    """Recount the days touched since the last run; None if one is running.
+
+    A lease on the analytics_state document lets one run at a time through,
+    across workers. Every day from the previous watermark's day onwards is
+    recounted, along with days marked stale by imports, so a run that
+    crashes before moving the watermark is simply redone by the next one.
+    The upper bound trails the clock by ANALYTICS_ROLLUP_LAG_SECONDS so
+    in-flight submissions are picked up by the next run, not skipped.
+    """
+    db = get_database()
+    owner = uuid.uuid4().hex
+    if (state := await _acquire_lease(db, owner)) is None:
+        return None
+
+    start = state.get("processedUntil")
+    stale_days = state.get("staleDays", [])
+    end = datetime.utcnow() - timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS)
+    release = {"$unset": {"leaseOwner": "", "leaseUntil": ""}}
+    try:
+        completed_at: Dict[str, datetime] = {"$lte": end}
+        if start is not None:
+            completed_at["$gte"] = _day(min(start, end))
+        await rebuild_rollups([completed_at, *day_ranges(stale_days)])
+    except Exception:
+        await db.analytics_state.update_one({"_id": ROLLUP_STATE_ID, "leaseOwner": owner}, release)
+        raise
+
+    # Stale days marked during the run stay for the next one
+    await db.analytics_state.update_one(
+        {"_id": ROLLUP_STATE_ID, "leaseOwner": owner},
+        {
+            **release,
+            "$max": {"processedUntil": end},
+            "$pullAll": {"staleDays": stale_days},
+            "$set": {"updatedAt": datetime.utcnow()}
+        }
+    )
+    return {"processedFrom": start, "processedUntil": end}
+
+async def _run_rollups() -> None:
+    while True:
+        for clinic_id in tenant_scopes():
+            try:
+                with tenant_context(clinic_id):
+                    await refresh_rollups()
+            except Exception as e:
+                print(f"Error refreshing analytics rollups: {str(e)}")
+        await asyncio.sleep(settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS)
+
+def start_rollups() -> None:
+    global _rollup_task
+    if _rollup_task is None:
+        _rollup_task = asyncio.create_task(_run_rollups())
+
+async def stop_rollups() -> None:
+    global _rollup_task
+    if _rollup_task is not None:
+        _rollup_task.cancel()
+        try:
+            await _rollup_task
+        except asyncio.CancelledError:
+            pass
+        _rollup_task = None
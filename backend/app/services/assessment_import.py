@@ -0,0 +1,245 @@
+import csv
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from bson import ObjectId
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from app.core import metrics
+from app.core.config import settings
+from app.core.etag import bump_versions, user_key, roster_key
+from app.db.mongodb import get_database
+from app.services.analytics import mark_days_stale
+from app.services.instruments import INSTRUMENTS, MAX_ITEM_SCORES, compact_questions, question_texts, score_answers
+from app.services.triage import record_assessment
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[bytes]]:
+    """Split a streamed upload into lines without holding all of it.
+
+    A line longer than IMPORT_MAX_LINE_BYTES comes out as None; its bytes
+    are dropped up to the next newline instead of being buffered.
+    """
+    limit = settings.IMPORT_MAX_LINE_BYTES
+    pending = b""
+    oversized = False
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            # The first line after an oversized one is where it ends
+            yield None if oversized or len(line) > limit else line
+            oversized = False
+        if len(pending) > limit:
+            pending, oversized = b"", True
+    if oversized:
+        yield None
+    elif pending:
+        yield pending
+
+async def _rows(chunks: AsyncIterator[bytes], format: str) -> AsyncIterator[Tuple[int, Any]]:
+    """(row number, parsed row or error message) for each non-empty row.
+
+    NDJSON rows carry the item scores as a "scores" array; CSV rows as
+    q1..qN columns after a header line. A row that can't be decoded or
+    parsed, or is longer than IMPORT_MAX_LINE_BYTES, is reported as an
+    error; only a bad CSV header raises ValueError, before anything is
+    imported.
+    """
+    header: Optional[List[str]] = None
+    number = 0
+    async for raw in _lines(chunks):
+        if raw is None:
+            line, decode_error = None, f"line longer than {settings.IMPORT_MAX_LINE_BYTES} bytes"
+        else:
+            try:
+                line = raw.decode("utf-8-sig").rstrip("\r")
+            except UnicodeDecodeError as e:
+                line, decode_error = None, f"invalid UTF-8: {str(e)}"
+        if line is not None and not line.strip():
+            continue
+        if format == "csv" and header is None:
+            try:
+                if line is None:
+                    raise ValueError(decode_error)
+                header = next(csv.reader([line]))
+            except (csv.Error, ValueError) as e:
+                raise ValueError(f"Invalid CSV header: {str(e)}")
+            continue
+        number += 1
+        if line is None:
+            yield number, decode_error
+        elif format == "csv":
+            try:
+                row = dict(zip(header, next(csv.reader([line]))))
+            except csv.Error as e:
+                yield number, f"invalid CSV: {str(e)}"
+                continue
+            scores = []
+            while (value := row.pop(f"q{len(scores) + 1}", "")) != "":
+                scores.append(value)
+            row["scores"] = scores
+            yield number, row
+        else:
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, f"invalid JSON: {str(e)}"
+
+def _parse_datetime(value: Any) -> datetime:
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _parse_score(value: Any) -> int:
+    # int() would also take 2.9, True and " 3"; a CSV score is digits only
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    raise ValueError("scores must be integers")
+
+def _build(row: Any, panel: Set[str]) -> Dict[str, Any]:
+    """The assessment document for a row, scored like a live submission."""
+    if not isinstance(row, dict):
+        raise ValueError(row if isinstance(row, str) else "row must be an object")
+
+    assessment_type = row.get("assessmentType")
+    if assessment_type not in INSTRUMENTS:
+        raise ValueError(f"assessmentType must be one of {', '.join(INSTRUMENTS)}")
+    user_id = str(row.get("userId", ""))
+    if user_id not in panel:
+        raise ValueError("userId is not a patient assigned to you")
+    try:
+        completed_at = _parse_datetime(row["completedAt"])
+    except (KeyError, ValueError):
+        raise ValueError("completedAt must be an ISO 8601 date")
+    if completed_at > datetime.utcnow():
+        raise ValueError("completedAt must not be in the future")
+
+    texts = question_texts(assessment_type)
+    scores = row.get("scores") or []
+    if not isinstance(scores, list):
+        raise ValueError("scores must be integers")
+    scores = [_parse_score(score) for score in scores]
+    if len(scores) != len(texts):
+        raise ValueError(f"{assessment_type} needs {len(texts)} scores, got {len(scores)}")
+    if not all(0 <= score <= MAX_ITEM_SCORES[assessment_type] for score in scores):
+        raise ValueError(f"scores must be between 0 and {MAX_ITEM_SCORES[assessment_type]}")
+
+    questions = [
+        {"questionId": position + 1, "questionText": text, "score": score}
+        for position, (text, score) in enumerate(zip(texts, scores))
+    ]
+    assessment = {
+        "_id": ObjectId(),
+        "userId": user_id,
+        "assessmentType": assessment_type,
+        "status": "completed",
+        **compact_questions(assessment_type, questions),
+        **score_answers(assessment_type, scores),
+        "startedAt": completed_at,
+        "completedAt": completed_at,
+        "importedAt": datetime.utcnow()
+    }
+    if row.get("externalId") not in (None, ""):
+        assessment["externalId"] = str(row["externalId"])
+    return assessment
+
+class ImportResult:
+    def __init__(self):
+        self.received = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        # Newest imported result per (patient, instrument), for the triage queue
+        self.latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Days the imported results fall on, recounted by the next rollup run
+        self.days: Set[datetime] = set()
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+async def _write(db, chunk: List[Tuple[int, Dict[str, Any]]], result: ImportResult) -> None:
+    failed: Set[int] = set()
+    try:
+        await db.assessments.bulk_write([InsertOne(assessment) for _, assessment in chunk], ordered=False)
+    except BulkWriteError as e:
+        if not e.details.get("writeErrors"):
+            raise
+        for write_error in e.details["writeErrors"]:
+            failed.add(write_error["index"])
+            message = "externalId was already imported for this patient" if write_error["code"] == 11000 else write_error["errmsg"]
+            result.error(chunk[write_error["index"]][0], message)
+
+    for index, (_, assessment) in enumerate(chunk):
+        if index in failed:
+            continue
+        result.imported += 1
+        key = (assessment["userId"], assessment["assessmentType"])
+        if key not in result.latest or assessment["completedAt"] > result.latest[key]["completedAt"]:
+            result.latest[key] = assessment
+        result.days.add(assessment["completedAt"])
+
+async def import_assessments(chunks: AsyncIterator[bytes], format: str, panel: List[str]) -> Dict[str, Any]:
+    """Validate and insert streamed rows in chunks of IMPORT_CHUNK_SIZE.
+
+    Each row is inserted or rejected on its own; rows carrying an
+    externalId already imported for the patient are rejected, so a failed
+    upload can be sent again as is. Triage and ETags are updated once at
+    the end, also when the upload breaks off, and the days the rows fall
+    on are left for the next rollup run to recount. Raises ValueError for
+    an unreadable CSV header.
+    """
+    db = get_database()
+    started = time.perf_counter()
+    result = ImportResult()
+    allowed = set(panel)
+
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    try:
+        async for number, row in _rows(chunks, format):
+            result.received += 1
+            try:
+                chunk.append((number, _build(row, allowed)))
+            except ValueError as e:
+                result.error(number, str(e))
+                continue
+            if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+                await _write(db, chunk, result)
+                chunk = []
+        if chunk:
+            await _write(db, chunk, result)
+    finally:
+        # Rows already written must reach triage and rollups even if the
+        # upload broke off, since a retry rejects them as duplicates
+        await _apply_side_effects(db, result)
+    elapsed = time.perf_counter() - started
+    metrics.increment("imports.rows", result.imported)
+    return {
+        "received": result.received,
+        "imported": result.imported,
+        "failed": result.failed,
+        "errors": result.errors,
+        "rowsPerSecond": round(result.received / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+async def _apply_side_effects(db, result: ImportResult) -> None:
+    await mark_days_stale(result.days)
+
+    for assessment in result.latest.values():
+        await record_assessment(assessment)
+
+    user_ids = list({user_id for user_id, _ in result.latest})
+    if user_ids:
+        assignments = await db.care_assignments.find(
+            {"patientId": {"$in": user_ids}},
+            projection={"doctorId": 1}
+        ).to_list(None)
+        await bump_versions(
+            *(user_key(user_id) for user_id in user_ids),
+            *{roster_key(assignment["doctorId"]) for assignment in assignments}
+        )
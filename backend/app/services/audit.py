@@ -0,0 +1,128 @@
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from pymongo.errors import BulkWriteError
+from app.core import metrics
+from app.core.config import settings
+from app.core.tenancy import get_current_tenant, tenant_context, database_scope
+from app.db.mongodb import get_database
+
+# Pending audit events; bounded by AUDIT_BUFFER_SIZE
+_buffer: Deque[Dict[str, Any]] = deque()
+_flush_needed: Optional[asyncio.Event] = None
+_flusher_task: Optional[asyncio.Task] = None
+
+def record(actor_id: str, patient_id: Optional[str], endpoint: str) -> None:
+    """Queue an access event without waiting on the database.
+
+    When the buffer is full the AUDIT_DROP_POLICY decides which event is
+    lost: "drop_oldest" evicts the oldest queued event, "drop_newest"
+    discards this one. Drops are counted in the audit.dropped metric.
+    """
+    if len(_buffer) >= settings.AUDIT_BUFFER_SIZE:
+        metrics.increment("audit.dropped")
+        if settings.AUDIT_DROP_POLICY == "drop_newest":
+            return
+        _buffer.popleft()
+
+    _buffer.append({
+        "actorId": actor_id,
+        "patientId": patient_id,
+        "endpoint": endpoint,
+        "clinicId": get_current_tenant(),
+        "timestamp": datetime.utcnow()
+    })
+    metrics.increment("audit.enqueued")
+
+    if _flush_needed is not None and len(_buffer) >= settings.AUDIT_BATCH_SIZE:
+        _flush_needed.set()
+
+def _requeue(events: List[Dict[str, Any]]) -> None:
+    # Put events back for the next flush, within the buffer bound
+    room = settings.AUDIT_BUFFER_SIZE - len(_buffer)
+    _buffer.extendleft(reversed(events[-room:] if room > 0 else []))
+
+async def flush() -> int:
+    """Write every queued event, AUDIT_BATCH_SIZE at a time per database.
+
+    insert_many stamps each event with its _id, so an event requeued after
+    a failure that had in fact been written is rejected as a duplicate on
+    the next flush and dropped rather than retried forever.
+    """
+    if not _buffer:
+        return 0
+
+    events: List[Dict[str, Any]] = []
+    while _buffer:
+        events.append(_buffer.popleft())
+
+    by_scope: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for event in events:
+        by_scope.setdefault(database_scope(event["clinicId"]), []).append(event)
+
+    flushed = 0
+    error = None
+    retry: List[Dict[str, Any]] = []
+    for scope, scope_events in by_scope.items():
+        with tenant_context(scope):
+            db = get_database()
+        for start in range(0, len(scope_events), settings.AUDIT_BATCH_SIZE):
+            batch = scope_events[start:start + settings.AUDIT_BATCH_SIZE]
+            try:
+                await db.audit_log.insert_many(batch, ordered=False)
+                written = len(batch)
+            except BulkWriteError as e:
+                # Only the events that failed, and not as duplicates, go back
+                failed = [write_error for write_error in e.details.get("writeErrors", []) if write_error["code"] != 11000]
+                retry.extend(batch[write_error["index"]] for write_error in failed)
+                written = e.details.get("nInserted", 0)
+                if failed:
+                    error = e
+            except Exception as e:
+                retry.extend(batch)
+                error = e
+                continue
+            flushed += written
+            metrics.increment("audit.flushed", written)
+
+    _requeue(retry)
+    if error is not None:
+        raise error
+    return flushed
+
+async def _run_flusher() -> None:
+    interval = settings.AUDIT_FLUSH_INTERVAL_MS / 1000
+    while True:
+        try:
+            await asyncio.wait_for(_flush_needed.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        _flush_needed.clear()
+        try:
+            await flush()
+        except Exception as e:
+            metrics.increment("audit.flush_errors")
+            print(f"Error flushing audit log: {str(e)}")
+
+def start_flusher() -> None:
+    global _flusher_task, _flush_needed
+    if _flusher_task is None:
+        _flush_needed = asyncio.Event()
+        _flusher_task = asyncio.create_task(_run_flusher())
+
+async def stop_flusher() -> None:
+    global _flusher_task, _flush_needed
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        try:
+            await _flusher_task
+        except asyncio.CancelledError:
+            pass
+        _flusher_task = None
+        _flush_needed = None
+    # Don't lose what is still queued on shutdown
+    try:
+        await flush()
+    except Exception as e:
+        print(f"Error flushing audit log: {str(e)}")
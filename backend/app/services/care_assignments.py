@@ -0,0 +1,28 @@
+from typing import List
+from app.db.mongodb import get_database
+
+async def get_patient_ids(doctor_id: str) -> List[str]:
+    """Ids of the patients on a doctor's panel (covered by the doctorId index)."""
+    db = get_database()
+    assignments = await db.care_assignments.find(
+        {"doctorId": doctor_id},
+        projection={"_id": 0, "patientId": 1}
+    ).to_list(None)
+    return [assignment["patientId"] for assignment in assignments]
+
+async def get_doctor_ids(patient_id: str) -> List[str]:
+    db = get_database()
+    return await db.care_assignments.distinct("doctorId", {"patientId": patient_id})
+
+async def is_assigned(doctor_id: str, patient_id: str) -> bool:
+    db = get_database()
+    return await db.care_assignments.count_documents(
+        {"doctorId": doctor_id, "patientId": patient_id},
+        limit=1
+    ) > 0
+
+async def can_view_patient(current_user: dict, patient_id: str) -> bool:
+    """Patients may view their own records, doctors those of their panel."""
+    if str(current_user["_id"]) == patient_id:
+        return True
+    return current_user["role"] == "doctor" and await is_assigned(str(current_user["_id"]), patient_id)
@@ -0,0 +1,144 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Question texts per instrument and version. A version is never edited once
+# assessments reference it; rewording a question means adding a new version.
+INSTRUMENTS: Dict[str, Dict[int, Tuple[str, ...]]] = {
+    # PHQ-9, submitted by the frontend as the "stress" assessment
+    "stress": {
+        1: (
+            "Little interest or pleasure in doing things",
+            "Feeling down, depressed, or hopeless",
+            "Trouble falling or staying asleep, or sleeping too much",
+            "Feeling tired or having little energy",
+            "Poor appetite or overeating",
+            "Feeling bad about yourself—or that you are a failure or have let yourself or your family down",
+            "Trouble concentrating on things, such as reading the newspaper or watching television",
+            "Moving or speaking so slowly that other people could have noticed? Or the opposite—being so fidgety or restless that you have been moving around a lot more than usual",
+            "Thoughts that you would be better off dead, or thoughts of hurting yourself in some way",
+        )
+    },
+    # GAD-7
+    "anxiety": {
+        1: (
+            "Feeling nervous, anxious, or on edge",
+            "Not being able to stop or control worrying",
+            "Worrying too much about different things",
+            "Trouble relaxing",
+            "Being so restless that it's hard to sit still",
+            "Becoming easily annoyed or irritable",
+            "Feeling afraid as if something awful might happen",
+        )
+    },
+    # PCL-5
+    "ptsd": {
+        1: (
+            # Criterion B: Re-experiencing
+            "Having repeated, disturbing memories of the stressful experience",
+            "Having repeated, disturbing dreams of the stressful experience",
+            "Suddenly feeling or acting as if the stressful experience were happening again",
+            "Feeling very upset when something reminded you of the stressful experience",
+            "Having strong physical reactions when something reminded you of the stressful experience",
+            # Criterion C: Avoidance
+            "Avoiding memories, thoughts, or feelings related to the stressful experience",
+            "Avoiding external reminders of the stressful experience",
+            # Criterion D: Negative alterations in cognition and mood
+            "Trouble remembering important parts of the stressful experience",
+            "Having strong negative beliefs about yourself, other people, or the world",
+            "Blaming yourself or someone else for the stressful experience",
+            "Having strong negative feelings such as fear, horror, anger, guilt, or shame",
+            "Loss of interest in activities you used to enjoy",
+            "Feeling distant or cut off from other people",
+            "Having trouble experiencing positive feelings",
+            # Criterion E: Alterations in arousal and reactivity
+            "Feeling irritable or having angry outbursts",
+            "Taking too many risks or doing things that could cause you harm",
+            "Being overly alert or watchful for danger",
+            "Being jumpy or easily startled",
+            "Having difficulty concentrating",
+            "Having trouble falling or staying asleep",
+        )
+    },
+}
+
+def current_version(assessment_type: str) -> Optional[int]:
+    versions = INSTRUMENTS.get(assessment_type)
+    return max(versions) if versions else None
+
+def question_texts(assessment_type: str, version: Optional[int] = None) -> Tuple[str, ...]:
+    version = version or current_version(assessment_type)
+    return INSTRUMENTS[assessment_type][version]
+
+def compact_questions(assessment_type: str, questions: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Storage fields for answers to the current version of an instrument.
+
+    Returns instrumentVersion plus the scores packed one byte per question,
+    in question order. None when the questions don't match the catalog
+    (other wording, order or count) or a score is out of byte range; the
+    caller then stores the questions as they are.
+    """
+    version = current_version(assessment_type)
+    if version is None:
+        return None
+    texts = INSTRUMENTS[assessment_type][version]
+    if len(questions) != len(texts):
+        return None
+    for position, question in enumerate(questions):
+        score = question.get("score")
+        if (
+            question.get("questionId") != position + 1
+            or question.get("questionText") != texts[position]
+            # Legacy null or float scores would not survive the round trip
+            or not isinstance(score, int)
+            or isinstance(score, bool)
+            or not 0 <= score <= 255
+        ):
+            return None
+    return {
+        "instrumentVersion": version,
+        "scores": bytes(question["score"] for question in questions)
+    }
+
+def hydrate(assessment: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore the questions array of a compactly stored assessment, in place."""
+    if assessment is None or "scores" not in assessment:
+        return assessment
+    texts = INSTRUMENTS[assessment["assessmentType"]][assessment["instrumentVersion"]]
+    assessment["questions"] = [
+        {"questionId": position + 1, "questionText": text, "score": score}
+        for position, (text, score) in enumerate(zip(texts, assessment.pop("scores")))
+    ]
+    return assessment
+
+def stored_questions(assessment_type: str, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The fields to store for these answers: compact when possible."""
+    return compact_questions(assessment_type, questions) or {"questions": questions}
+
+# Highest score a single item can take
+MAX_ITEM_SCORES: Dict[str, int] = {"stress": 3, "anxiety": 3, "ptsd": 4}
+
+# Severity bands on the total score, upper bound first, as shown to patients
+SEVERITY_BANDS: Dict[str, List[Tuple[Optional[int], str]]] = {
+    "stress": [(4, "minimal"), (9, "mild"), (14, "moderate"), (19, "moderately severe"), (None, "severe")],
+    "anxiety": [(4, "Minimal anxiety"), (9, "Mild anxiety"), (14, "Moderate anxiety"), (None, "Severe anxiety")],
+    "ptsd": [(20, "Minimal symptoms"), (40, "Mild symptoms"), (60, "Moderate symptoms"), (None, "Severe symptoms")],
+}
+
+# PCL-5 DSM-5 criteria: (first item, last item, items rated 2 or more needed)
+PTSD_CRITERIA: Dict[str, Tuple[int, int, int]] = {
+    "criteriaB": (1, 5, 1),
+    "criteriaC": (6, 7, 1),
+    "criteriaD": (8, 14, 2),
+    "criteriaE": (15, 20, 2),
+}
+
+def score_answers(assessment_type: str, scores: List[int]) -> Dict[str, Any]:
+    """Total score, severity and instrument-specific flags for item scores."""
+    total = sum(scores)
+    result: Dict[str, Any] = {
+        "score": total,
+        "severity": next(label for bound, label in SEVERITY_BANDS[assessment_type] if bound is None or total <= bound)
+    }
+    if assessment_type == "ptsd":
+        for name, (first, last, needed) in PTSD_CRITERIA.items():
+            result[name] = sum(1 for score in scores[first - 1:last] if score >= 2) >= needed
+    return result
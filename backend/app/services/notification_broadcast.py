@@ -0,0 +1,128 @@
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from bson import ObjectId
+from app.core.config import settings
+from app.db.mongodb import get_database
+from app.models.notification import NotificationBroadcast, BroadcastTarget
+from app.services.care_assignments import get_patient_ids
+
+# Job fields that change while a broadcast runs
+PROGRESS_FIELDS = ("status", "created", "batches", "notificationsPerSecond", "startedAt", "finishedAt", "error")
+
+def transform_job(job_doc: Dict[str, Any]) -> Dict[str, Any]:
+    job = dict(job_doc)
+    job["id"] = job.pop("_id")
+    return job
+
+async def create_job(created_by: str) -> Dict[str, Any]:
+    """Store a new pending broadcast job and return it.
+
+    Jobs are kept in broadcast_jobs, so any worker can report on them, and
+    expire NOTIFICATION_BROADCAST_JOB_TTL_HOURS after they were created.
+    """
+    db = get_database()
+    job = {
+        "_id": uuid.uuid4().hex,
+        "status": "pending",
+        "createdBy": created_by,
+        "created": 0,
+        "batches": 0,
+        "notificationsPerSecond": 0.0,
+        "startedAt": None,
+        "finishedAt": None,
+        "error": None,
+        "createdAt": datetime.utcnow()
+    }
+    await db.broadcast_jobs.insert_one(job)
+    return transform_job(job)
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    db = get_database()
+    if (job := await db.broadcast_jobs.find_one({"_id": job_id})) is not None:
+        return transform_job(job)
+    return None
+
+async def build_user_filter(target: BroadcastTarget, doctor_id: str) -> Dict[str, Any]:
+    """Translate a broadcast target selector into a users query.
+
+    The query matches the patients on the doctor's panel, narrowed to those
+    with a pending assessment type when the target lists any.
+    """
+    db = get_database()
+    patient_ids = await get_patient_ids(doctor_id)
+
+    if target.pendingAssessmentTypes:
+        # A patient is done only once every requested type is completed
+        done = None
+        for assessment_type in target.pendingAssessmentTypes:
+            completed = set(await db.assessments.distinct(
+                "userId",
+                {"userId": {"$in": patient_ids}, "assessmentType": assessment_type, "status": "completed"}
+            ))
+            done = completed if done is None else done & completed
+        patient_ids = [user_id for user_id in patient_ids if user_id not in done]
+
+    return {
+        "role": "patient",
+        "_id": {"$in": [ObjectId(user_id) for user_id in patient_ids]}
+    }
+
+async def run_broadcast(job_id: str, broadcast: NotificationBroadcast) -> None:
+    """Stream matching users and insert their notifications in batches."""
+    db = get_database()
+    job = await db.broadcast_jobs.find_one({"_id": job_id})
+    batch_size = settings.NOTIFICATION_BROADCAST_BATCH_SIZE
+
+    job["status"] = "running"
+    job["startedAt"] = datetime.utcnow()
+    started = time.perf_counter()
+    await _save(db, job)
+
+    try:
+        query = await build_user_filter(broadcast.target, job["createdBy"])
+        cursor = db.users.find(query, projection={"_id": 1}, batch_size=batch_size)
+
+        batch: List[Dict[str, Any]] = []
+        async for user in cursor:
+            batch.append({
+                "userId": str(user["_id"]),
+                "type": broadcast.type,
+                "message": broadcast.message,
+                "read": False,
+                "createdAt": datetime.utcnow()
+            })
+            if len(batch) >= batch_size:
+                await _flush(db, job, batch, started)
+                batch = []
+
+        if batch:
+            await _flush(db, job, batch, started)
+
+        job["status"] = "completed"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        job["finishedAt"] = datetime.utcnow()
+        _update_throughput(job, started)
+        await _save(db, job)
+
+async def _flush(db, job: Dict[str, Any], batch: List[Dict[str, Any]], started: float) -> None:
+    await db.notifications.insert_many(batch, ordered=False)
+    job["created"] += len(batch)
+    job["batches"] += 1
+    _update_throughput(job, started)
+    await _save(db, job)
+
+async def _save(db, job: Dict[str, Any]) -> None:
+    await db.broadcast_jobs.update_one(
+        {"_id": job["_id"]},
+        {"$set": {field: job[field] for field in PROGRESS_FIELDS}}
+    )
+
+def _update_throughput(job: Dict[str, Any], started: float) -> None:
+    elapsed = time.perf_counter() - started
+    if elapsed > 0:
+        job["notificationsPerSecond"] = round(job["created"] / elapsed, 2)
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ReplaceOne
+from app.core.config import settings
+from app.core.tenancy import tenant_context, tenant_scopes
+from app.db.mongodb import get_database
+
+# Only the fields the archive needs; _id is kept so moves are idempotent
+ARCHIVE_PROJECTION = {"_id": 1, "userId": 1, "type": 1, "message": 1, "read": 1, "createdAt": 1}
+
+_archiver_task: Optional[asyncio.Task] = None
+
+async def archive_old_notifications() -> int:
+    """Move read notifications older than the archive age into notifications_archive.
+
+    Unread notifications stay in the inbox however old they are. Documents
+    are copied and removed in batches; re-running after a partial failure
+    is safe because already archived ids are upserted, not duplicated.
+    """
+    db = get_database()
+    cutoff = datetime.utcnow() - timedelta(days=settings.NOTIFICATION_ARCHIVE_AFTER_DAYS)
+    batch_size = settings.NOTIFICATION_ARCHIVE_BATCH_SIZE
+    moved = 0
+
+    while True:
+        batch = await db.notifications.find(
+            {"read": True, "createdAt": {"$lt": cutoff}},
+            projection=ARCHIVE_PROJECTION
+        ).sort("createdAt", 1).limit(batch_size).to_list(None)
+        if not batch:
+            break
+
+        ids = [doc["_id"] for doc in batch]
+        archived_at = datetime.utcnow()
+        for doc in batch:
+            doc["archivedAt"] = archived_at
+
+        # Upsert by _id rather than insert_many so retries never collide
+        await db.notifications_archive.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch],
+            ordered=False
+        )
+        await db.notifications.delete_many({"_id": {"$in": ids}})
+        moved += len(batch)
+
+        if len(batch) < batch_size:
+            break
+
+    return moved
+
+async def _run_archiver() -> None:
+    while True:
+        for clinic_id in tenant_scopes():
+            try:
+                with tenant_context(clinic_id):
+                    moved = await archive_old_notifications()
+                if moved:
+                    print(f"Archived {moved} notifications")
+            except Exception as e:
+                print(f"Error archiving notifications: {str(e)}")
+        await asyncio.sleep(settings.NOTIFICATION_ARCHIVE_INTERVAL_SECONDS)
+
+def start_archiver() -> None:
+    global _archiver_task
+    if _archiver_task is None:
+        _archiver_task = asyncio.create_task(_run_archiver())
+
+async def stop_archiver() -> None:
+    global _archiver_task
+    if _archiver_task is not None:
+        _archiver_task.cancel()
+        try:
+            await _archiver_task
+        except asyncio.CancelledError:
+            pass
+        _archiver_task = None
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.core.tenancy import tenant_context, tenant_scopes
+from app.db.mongodb import get_database
+from app.services.instruments import INSTRUMENTS
+
+EXPORT_STATE_ID = "parquet_assessments"
+# assessmentType is free text; only known types get a partition of their own
+OTHER_PARTITION = "other"
+
+_export_lock = asyncio.Lock()
+
+def question_count(assessment_type: str) -> int:
+    """Width of the fixed q1..qN score columns for an instrument."""
+    versions = INSTRUMENTS.get(assessment_type, {})
+    return max((len(texts) for texts in versions.values()), default=0)
+
+def partition_type(assessment_type: Any) -> str:
+    """The assessmentType partition a result is written to."""
+    if assessment_type in INSTRUMENTS or assessment_type == "pre":
+        return assessment_type
+    return OTHER_PARTITION
+
+def _schema(pa, assessment_type: str):
+    # assessmentType and month are partition keys, encoded in the directory
+    fields = [
+        ("id", pa.string()),
+        ("userId", pa.string()),
+        ("clinicId", pa.string()),
+        ("status", pa.string()),
+        ("score", pa.float64()),
+        ("normalizedScore", pa.float64()),
+        ("severity", pa.string()),
+        ("startedAt", pa.timestamp("ms")),
+        ("completedAt", pa.timestamp("ms")),
+        ("instrumentVersion", pa.int16())
+    ]
+    width = question_count(assessment_type)
+    fields += [(f"q{n}", pa.uint8()) for n in range(1, width + 1)]
+    if not width:
+        # Free-form instruments keep their responses as a JSON string
+        fields.append(("responses", pa.string()))
+    if assessment_type == OTHER_PARTITION:
+        # Not assessmentType, which readers take from the partition directory
+        fields.append(("sourceType", pa.string()))
+    return pa.schema(fields)
+
+def _scores(assessment: Dict[str, Any], width: int) -> List[Optional[int]]:
+    scores: List[Optional[int]] = [None] * width
+    if "scores" in assessment:
+        for position, score in enumerate(assessment["scores"][:width]):
+            scores[position] = score
+    else:
+        for question in assessment.get("questions", []):
+            position, score = question.get("questionId", 0) - 1, question.get("score")
+            if 0 <= position < width and isinstance(score, int) and 0 <= score <= 255:
+                scores[position] = score
+    return scores
+
+def _row(assessment: Dict[str, Any], width: int, other: bool = False) -> Dict[str, Any]:
+    row = {
+        "id": str(assessment["_id"]),
+        "userId": assessment.get("userId"),
+        "clinicId": assessment.get("clinicId"),
+        "status": assessment.get("status"),
+        "score": assessment.get("score"),
+        "normalizedScore": assessment.get("normalizedScore"),
+        "severity": assessment.get("severity"),
+        "startedAt": assessment.get("startedAt"),
+        "completedAt": assessment["completedAt"],
+        "instrumentVersion": assessment.get("instrumentVersion")
+    }
+    if width:
+        for n, score in enumerate(_scores(assessment, width), start=1):
+            row[f"q{n}"] = score
+    else:
+        row["responses"] = json.dumps(assessment.get("responses"), default=str)
+    if other:
+        source_type = assessment.get("assessmentType")
+        row["sourceType"] = None if source_type is None else str(source_type)
+    return row
+
+class _PartitionWriter:
+    """Row groups of one assessmentType/month partition, written to a temp
+    file that only takes its final name once the whole run succeeded."""
+
+    def __init__(self, pa, pq, assessment_type: str, path: str):
+        self.pa = pa
+        self.pq = pq
+        self.schema = _schema(pa, assessment_type)
+        self.width = question_count(assessment_type)
+        self.other = assessment_type == OTHER_PARTITION
+        self.path = path
+        self.rows: List[Dict[str, Any]] = []
+        self.written = 0
+        self._writer = None
+
+    def add(self, assessment: Dict[str, Any]) -> None:
+        self.rows.append(_row(assessment, self.width, self.other))
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._writer = self.pq.ParquetWriter(self.path + ".tmp", self.schema, compression="zstd")
+        self._writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+        self.written += len(self.rows)
+        self.rows = []
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def publish(self) -> None:
+        if self.written:
+            os.replace(self.path + ".tmp", self.path)
+
+    def discard(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self.path + ".tmp"):
+            os.remove(self.path + ".tmp")
+
+async def _acquire_lease(db, owner: str) -> Optional[Dict[str, Any]]:
+    now = datetime.utcnow()
+    try:
+        return await db.export_state.find_one_and_update(
+            {"_id": EXPORT_STATE_ID, "$or": [{"leaseUntil": {"$exists": False}}, {"leaseUntil": {"$lt": now}}]},
+            {"$set": {"leaseOwner": owner, "leaseUntil": now + timedelta(seconds=settings.EXPORT_LEASE_SECONDS)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # The state document exists and another run holds the lease
+        return None
+
+def _stamp(moment: Optional[datetime]) -> str:
+    return moment.strftime("%Y%m%dT%H%M%S%f") if moment is not None else "0"
+
+async def export_assessments(clinic_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Append assessments completed or imported since the last export to the Parquet dataset.
+
+    Streams completed assessments of one tenant scope from a cursor and
+    writes them under EXPORT_PARQUET_DIR as
+    assessmentType=<type>/month=<YYYY-MM>/part-<scope>-<from>-<until>.parquet,
+    one file per partition and range. Types outside the catalog share the
+    "other" partition and keep their value in a sourceType column.
+    None if another run holds the lease on the export_state document.
+
+    The range is recorded as pendingUntil before any file is written, and
+    the exportedUntil watermark only advances once every file is in place.
+    A run that crashes in between is redone over the same range by the
+    next one, which replaces the same files instead of adding duplicates.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    db = get_database()
+    owner = uuid.uuid4().hex
+    if (state := await _acquire_lease(db, owner)) is None:
+        return None
+
+    start = state.get("exportedUntil")
+    if (end := state.get("pendingUntil")) is None:
+        end = datetime.utcnow() - timedelta(seconds=settings.EXPORT_LAG_SECONDS)
+        # As stored by MongoDB, so a rerun names its files the same way
+        end = end.replace(microsecond=end.microsecond // 1000 * 1000)
+    release = {"$unset": {"leaseOwner": "", "leaseUntil": ""}}
+    if start is not None and start >= end:
+        await db.export_state.update_one({"_id": EXPORT_STATE_ID, "leaseOwner": owner}, release)
+        return {"exportedFrom": start, "exportedUntil": start, "rows": 0, "files": 0}
+    await db.export_state.update_one(
+        {"_id": EXPORT_STATE_ID, "leaseOwner": owner},
+        {"$set": {"pendingUntil": end}}
+    )
+
+    query: Dict[str, Any] = {"status": "completed", "completedAt": {"$type": "date", "$lte": end}}
+    if start is not None:
+        query["completedAt"]["$gt"] = start
+        # Imported results dated before the watermark go by when they arrived
+        query = {"$or": [
+            query,
+            {
+                "status": "completed",
+                "completedAt": {"$type": "date", "$lte": start},
+                "importedAt": {"$gt": start, "$lte": end}
+            }
+        ]}
+    cursor = db.assessments.find(query, batch_size=settings.EXPORT_BATCH_SIZE)
+
+    run_id = f"{clinic_id or 'shared'}-{_stamp(start)}-{_stamp(end)}"
+    root = os.path.realpath(settings.EXPORT_PARQUET_DIR)
+    writers: Dict[Tuple[str, str], _PartitionWriter] = {}
+    try:
+        async for assessment in cursor:
+            partition = (partition_type(assessment.get("assessmentType")), assessment["completedAt"].strftime("%Y-%m"))
+            if (writer := writers.get(partition)) is None:
+                path = os.path.realpath(os.path.join(
+                    root,
+                    f"assessmentType={partition[0]}",
+                    f"month={partition[1]}",
+                    f"part-{run_id}.parquet"
+                ))
+                if os.path.commonpath([root, path]) != root:
+                    raise ValueError(f"Export path {path} is outside {root}")
+                writer = writers[partition] = _PartitionWriter(pa, pq, partition[0], path)
+            writer.add(assessment)
+            if len(writer.rows) >= settings.EXPORT_BATCH_SIZE:
+                # Encoding is CPU-bound; keep it off the event loop
+                await asyncio.to_thread(writer.flush)
+        for writer in writers.values():
+            await asyncio.to_thread(writer.close)
+        for writer in writers.values():
+            writer.publish()
+    except BaseException:
+        for writer in writers.values():
+            writer.discard()
+        await db.export_state.update_one({"_id": EXPORT_STATE_ID, "leaseOwner": owner}, release)
+        raise
+
+    await db.export_state.update_one(
+        {"_id": EXPORT_STATE_ID, "leaseOwner": owner},
+        {
+            "$set": {"exportedUntil": end, "updatedAt": datetime.utcnow()},
+            "$unset": {"pendingUntil": "", "leaseOwner": "", "leaseUntil": ""}
+        }
+    )
+    return {
+        "exportedFrom": start,
+        "exportedUntil": end,
+        "rows": sum(writer.written for writer in writers.values()),
+        "files": len(writers)
+    }
+
+async def export_all() -> Dict[str, Optional[Dict[str, Any]]]:
+    """Run the incremental export for every database; one run at a time.
+
+    A scope maps to None when a run elsewhere holds its lease.
+    """
+    async with _export_lock:
+        results = {}
+        for clinic_id in tenant_scopes():
+            with tenant_context(clinic_id):
+                results[clinic_id or "shared"] = await export_assessments(clinic_id)
+        return results
+
+def export_running() -> bool:
+    return _export_lock.locked()
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+import bson
+from pymongo import UpdateOne
+from app.core import invalidation
+from app.core.cache import get_cache
+from app.core.tenancy import tenant_context
+from app.db.mongodb import get_database
+from app.models.assessment import DEFAULT_QUESTIONS
+
+# Immutable snapshot of the pre-assessment questions, ordered by "order",
+# and the BSON it was decoded from
+_questions: Tuple[Dict[str, Any], ...] = ()
+_encoded: Optional[bytes] = None
+# The latest snapshot, as BSON of {"questions": [...]}, for every worker
+_cache = get_cache("question_catalog", 1)
+CACHE_KEY = "questions"
+
+async def seed_questions() -> None:
+    """Seed the default questions into an empty catalog.
+
+    Each default is upserted by its order with $setOnInsert, so concurrent
+    workers starting together cannot duplicate it.
+    """
+    with tenant_context(None):
+        db = get_database()
+    if await db.pre_assessment_questions.count_documents({}, limit=1):
+        return
+    await db.pre_assessment_questions.bulk_write(
+        [
+            UpdateOne({"order": question["order"]}, {"$setOnInsert": question}, upsert=True)
+            for question in DEFAULT_QUESTIONS
+        ],
+        ordered=False
+    )
+
+async def refresh_questions() -> None:
+    """Reload the snapshot from the shared database and share it with the other workers."""
+    global _questions, _encoded
+    with tenant_context(None):
+        db = get_database()
+    questions = await db.pre_assessment_questions.find().sort("order", 1).to_list(None)
+    _questions, _encoded = tuple(questions), bson.encode({"questions": questions})
+    await _cache.set(CACHE_KEY, _encoded)
+
+async def get_questions() -> Tuple[Dict[str, Any], ...]:
+    """The latest snapshot any worker loaded; this worker's own if the cache has none."""
+    global _questions, _encoded
+    encoded = await _cache.get(CACHE_KEY)
+    if encoded is not None and encoded != _encoded:
+        _questions, _encoded = tuple(bson.decode(encoded)["questions"]), encoded
+    return _questions
+
+_refresh_tasks = set()
+
+async def _refresh_after_change() -> None:
+    try:
+        await refresh_questions()
+    except Exception as e:
+        print(f"Error refreshing question catalog: {str(e)}")
+
+def _on_questions_change(event: invalidation.InvalidationEvent) -> None:
+    # The catalog is read from the shared database
+    if event.scope is not None:
+        return
+    task = asyncio.create_task(_refresh_after_change())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+invalidation.subscribe("pre_assessment_questions", _on_questions_change)
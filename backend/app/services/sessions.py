@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from app.core import metrics
+from app.core.config import settings
+from app.core.security import create_refresh_token, hash_refresh_token
+from app.db.mongodb import get_database
+
+async def create_session(user_id: str, family_id: Optional[str] = None) -> Tuple[str, str]:
+    """Store a new refresh token for the user; returns (token, familyId).
+
+    A family is the chain of tokens descending from one login. Each refresh
+    replaces the token with the next one in its family.
+    """
+    db = get_database()
+    token = create_refresh_token()
+    family_id = family_id or uuid.uuid4().hex
+    now = datetime.utcnow()
+    await db.sessions.insert_one({
+        "_id": hash_refresh_token(token),
+        "userId": user_id,
+        "familyId": family_id,
+        "createdAt": now,
+        "expiresAt": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        "replacedAt": None
+    })
+    return token, family_id
+
+async def rotate_session(token: str) -> Optional[Tuple[Dict[str, Any], str]]:
+    """Consume a refresh token; returns (session, next token) or None.
+
+    Presenting a token that was already rotated means it leaked, so the
+    whole family is revoked and the legitimate holder must log in again.
+    """
+    db = get_database()
+    token_hash = hash_refresh_token(token)
+    now = datetime.utcnow()
+
+    session = await db.sessions.find_one_and_update(
+        {"_id": token_hash, "replacedAt": None, "expiresAt": {"$gt": now}},
+        {"$set": {"replacedAt": now}}
+    )
+    if session is None:
+        reused = await db.sessions.find_one({"_id": token_hash, "replacedAt": {"$ne": None}})
+        if reused is not None:
+            metrics.increment("auth.refresh_reuse_detected")
+            await revoke_family(reused["familyId"])
+        return None
+
+    next_token, _ = await create_session(session["userId"], session["familyId"])
+    metrics.increment("auth.refreshes")
+    return session, next_token
+
+async def revoke_family(family_id: str) -> None:
+    db = get_database()
+    await db.sessions.delete_many({"familyId": family_id})
+
+async def revoke_user_sessions(user_id: str) -> None:
+    db = get_database()
+    await db.sessions.delete_many({"userId": user_id})
@@ -0,0 +1,93 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from app.db.mongodb import get_database
+
+def severity_rank(severity: Optional[str]) -> int:
+    """Map the free-text severities used by the instruments onto 0-4."""
+    severity = (severity or "").lower()
+    if "moderately severe" in severity:
+        return 3
+    if "severe" in severity:
+        return 4
+    if "moderate" in severity:
+        return 2
+    if "mild" in severity:
+        return 1
+    return 0
+
+async def record_assessment(assessment: Dict[str, Any]) -> None:
+    """Update the patient's triage entry with a completed assessment.
+
+    The entry keeps the latest result per instrument, by completedAt; its
+    severityRank is the highest rank among them, recomputed in the same
+    update.
+    """
+    if assessment.get("status") != "completed" or not assessment.get("severity"):
+        return
+
+    db = get_database()
+    completed_at = assessment.get("completedAt") or datetime.utcnow()
+    latest = {
+        "severity": assessment["severity"],
+        "rank": severity_rank(assessment["severity"]),
+        "score": assessment.get("score"),
+        "completedAt": completed_at
+    }
+
+    instrument = f"instruments.{assessment['assessmentType']}"
+    await db.triage.update_one(
+        {"_id": assessment["userId"]},
+        [
+            {"$set": {
+                # Older results, e.g. from replays or imports, don't replace newer ones
+                instrument: {"$cond": [
+                    {"$gte": [completed_at, {"$ifNull": [f"${instrument}.completedAt", datetime.min]}]},
+                    {"$literal": latest},
+                    f"${instrument}"
+                ]},
+                "latestAssessmentAt": {"$max": ["$latestAssessmentAt", completed_at]}
+            }},
+            {"$set": {
+                "severityRank": {"$max": {"$map": {
+                    "input": {"$objectToArray": "$instruments"},
+                    "in": "$$this.v.rank"
+                }}}
+            }}
+        ],
+        upsert=True
+    )
+
+async def forget_assessment(user_id: str, assessment_type: str) -> None:
+    """Recompute a patient's entry for one instrument after a result is deleted.
+
+    The instrument falls back to its latest remaining completed result; the
+    entry is removed once no instrument is left.
+    """
+    db = get_database()
+    previous = await db.assessments.find_one(
+        {"userId": user_id, "assessmentType": assessment_type, "status": "completed", "severity": {"$exists": True}},
+        sort=[("completedAt", -1)]
+    )
+
+    instrument = f"instruments.{assessment_type}"
+    if previous is not None:
+        change = {"$set": {instrument: {"$literal": {
+            "severity": previous["severity"],
+            "rank": severity_rank(previous["severity"]),
+            "score": previous.get("score"),
+            "completedAt": previous.get("completedAt") or datetime.utcnow()
+        }}}}
+    else:
+        change = {"$unset": instrument}
+    instruments = {"$objectToArray": {"$ifNull": ["$instruments", {}]}}
+    await db.triage.update_one(
+        {"_id": user_id},
+        [
+            change,
+            {"$set": {
+                "severityRank": {"$max": {"$map": {"input": instruments, "in": "$$this.v.rank"}}},
+                "latestAssessmentAt": {"$max": {"$map": {"input": instruments, "in": "$$this.v.completedAt"}}}
+            }}
+        ]
+    )
+    await db.triage.delete_one({"_id": user_id, "instruments": {}})